@@ -0,0 +1,74 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Check the import time of cepy_tools against a budget
+
+Runs each import statement in a fresh interpreter with `-X importtime`
+and takes the best of several runs. Exits non-zero if any import goes
+over budget or pulls in modules that should only load on first use.
+
+    python benchmarks/import_time.py
+"""
+
+import subprocess
+import sys
+
+# statement -> (budget in milliseconds, modules that must not be imported)
+BUDGETS = {
+    "import cepy_tools": (10, ["cepy_tools.cepy", "cepy_dict"]),
+    "import cepy_tools.pinyin": (20, ["cepy_tools.cepy", "cepy_dict", "csv"]),
+}
+RUNS = 5
+
+
+def import_times(statement):
+    """Cumulative import time in microseconds of each imported module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    failed = False
+    for statement, (budget_ms, forbidden) in BUDGETS.items():
+        module = statement.split()[-1]
+        runs = [import_times(statement) for _ in range(RUNS)]
+        best_ms = min(r[module] for r in runs) / 1000
+        loaded = sorted(m for m in forbidden if m in runs[0])
+
+        ok = best_ms <= budget_ms and not loaded
+        failed = failed or not ok
+        print("{status} {stmt:<30} {best:6.1f} ms (budget {budget} ms){extra}".format(
+            status="ok  " if ok else "FAIL",
+            stmt=statement,
+            best=best_ms,
+            budget=budget_ms,
+            extra=f" -- also imported {', '.join(loaded)}" if loaded else "",
+        ))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
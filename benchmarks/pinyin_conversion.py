@@ -0,0 +1,71 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Check pinyin to hanzi conversion stays interactive
+
+Converts 20 syllable inputs with the full dictionary and exits
+non-zero if the median conversion of any of them takes longer than
+the budget. Along with everyday sentences, the inputs include a
+syllable repeated 20 times, which is as ambiguous as input gets.
+
+    python benchmarks/pinyin_conversion.py
+"""
+
+import statistics
+import sys
+import time
+
+from cepy_tools import CeDict
+from cepy_tools.pinyin_conversion import PinyinConverter
+
+BUDGET_MS = 10
+# Every input is 20 syllables
+INPUTS = [
+    "womenjintianyiqiquzhongguocanguanchifanranhouzuoditiehuijia",
+    "tashuozhegewentifeichangzhongyaowomenyinggaihaohaotaolunyixia",
+    "wozaixuexiaoxuexihanyujuedehanyuhenyouyisiyehenyouyong",
+    "woxihuanchengxushejiyinweitahenyouyisierqiekeyizhuanqian",
+    "wo3 xi3huan1 cheng2xu4 she4ji4 wo3men5 dou1 xi3huan1 ta1 ye3 xi3huan1 chi1 zhong1guo2 cai4",
+    "xian" * 20,
+    "shi" * 20,
+    "yi" * 20,
+]
+RUNS = 20
+
+
+def main():
+    converter = PinyinConverter(CeDict())
+    converter.convert("wo")  # build the index
+
+    failed = False
+    for pinyin in INPUTS:
+        timings = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            best = converter.convert(pinyin, k=5)[0]
+            timings.append((time.perf_counter() - start) * 1000)
+        median = statistics.median(timings)
+        ok = median <= BUDGET_MS
+        failed = failed or not ok
+        print("{status} {ms:5.1f} ms  {pinyin} -> {best}".format(
+            status="ok  " if ok else "FAIL", ms=median, pinyin=pinyin, best=best,
+        ))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compare greedy segmentation with and without the script-run pre-tokenizer
+
+Segments a bilingual text with `greedy` and with `pretokenized`
+(which passes only the CJK runs to `greedy`), checks they find the
+same CJK words, and exits non-zero if the pre-tokenizer isn't at
+least MIN_SPEEDUP times faster.
+
+    python benchmarks/segmentation.py
+"""
+
+import random
+import sys
+import time
+
+from cepy_tools import CeDict
+from cepy_tools import word_segmentation as ws
+
+MIN_SPEEDUP = 2.0
+SENTENCES = [
+    "我很喜欢程序设计。今天我们学习中文，",
+    " The quick brown fox jumps over 12345 lazy dogs, and Python 3.10 is great! ",
+    "他说：“Hello, world!” ",
+]
+SENTENCE_COUNT = 5000
+RUNS = 5
+
+
+def best_time(segment):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        output = segment()
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
+
+
+def main():
+    cedict = CeDict()
+    rng = random.Random(0)
+    text = "".join(rng.choice(SENTENCES) for _ in range(SENTENCE_COUNT))
+
+    greedy_time, (greedy_words, _) = best_time(lambda: ws.greedy(text, cedict.is_word))
+    pre_time, (pre_words, _) = best_time(lambda: ws.pretokenized(text, cedict.is_word))
+    cjk_words = [w for w in greedy_words if ws.CJK_RUN_PATTERN.fullmatch(w)]
+
+    speedup = greedy_time / pre_time
+    ok = speedup >= MIN_SPEEDUP and cjk_words == pre_words
+    print(f"{len(text)} characters")
+    print(f"greedy       {greedy_time * 1000:7.1f} ms")
+    print(f"pretokenized {pre_time * 1000:7.1f} ms  ({speedup:.1f}x)")
+    if cjk_words != pre_words:
+        print("FAIL CJK words differ")
+    elif not ok:
+        print(f"FAIL expected at least {MIN_SPEEDUP}x")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,11 +15,54 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from .cepy import (
-    CeDict,
-    CeDictEntry,
-    KnowledgeBase,
-    Text,
-    StudyPlan,
-    PlanEntry
-)
+import importlib
+
+# Public names are loaded on first use (PEP 562), so `import
+# cepy_tools` stays cheap for callers that only need a submodule like
+# `cepy_tools.pinyin`.
+_lazy_attributes = {
+    "CeDict": "cepy",
+    "CeDictEntry": "cepy",
+    "CeDictOverlay": "cepy",
+    "LayeredCeDict": "cepy",
+    "LiveCeDict": "cepy",
+    "KnowledgeBase": "cepy",
+    "Text": "cepy",
+    "StudyPlan": "cepy",
+    "PlanEntry": "cepy",
+    "ReadingPlan": "cepy",
+    "SentenceIndex": "cepy",
+    "coverage_many": "cepy",
+}
+
+# Submodules are imported on first attribute access too, so
+# `cepy_tools.cepy` works after a plain `import cepy_tools`.
+_lazy_submodules = {
+    "cepy",
+    "corpus",
+    "differential",
+    "frequency_sketch",
+    "pinyin",
+    "pinyin_conversion",
+    "script_conversion",
+    "serialize",
+    "term_mining",
+    "word_segmentation",
+}
+
+__all__ = list(_lazy_attributes)
+
+def __getattr__(name):
+    if name in _lazy_submodules:
+        # Importing a submodule sets it as an attribute of the package
+        return importlib.import_module(f".{name}", __name__)
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{module_name}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | _lazy_submodules)
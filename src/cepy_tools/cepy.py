@@ -15,60 +15,545 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import array
+import bisect
 import cepy_dict
 import collections
+import functools
+import hashlib
+import itertools
 import pathlib
+import re
 import textwrap
+import threading
+import types
 import unicodedata
+import weakref
 
+import cepy_tools.frequency_sketch as frequency_sketch
+import cepy_tools.pinyin as pin
 import cepy_tools.serialize as cepy_serial
+import cepy_tools.word_segmentation as ws
 
 class CeDict:
+    """A chinese english dictionary with O(1) exact match lookups
+
+    A CeDict is never mutated once built. The entry list and indexes
+    are tuples inside plain dicts that are only ever read, and the
+    indexes built on first use are built under a lock and published
+    whole. A single CeDict can be shared by every thread in a pool,
+    including on free-threaded CPython builds.
+    """
     def __init__(self, path=None):
         self.cc_cedict_path = path
 
-        # A list of CeDictEntry objects. Should never be mutated after
-        # creation.
-        self._dict = CeDict._read_dict_file(self.cc_cedict_path)
+        # A tuple of CeDictEntry objects.
+        self._dict = tuple(CeDict._read_dict_file(self.cc_cedict_path))
+        self._build_indexes()
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build a dictionary from CeDictEntry objects or cc-cedict lines
+
+        Useful for small dictionaries, like glossaries of custom words,
+        that don't live in a file of their own.
+        """
+        cedict = cls.__new__(cls)
+        cedict.cc_cedict_path = None
+        cedict._dict = tuple(_as_entries(entries))
+        cedict._build_indexes()
+        return cedict
 
+    def _build_indexes(self):
         # These dicts provide O(1) lookup for exact matches. The value
-        # for each dict entry is an index to the `self._dict` list.
+        # for each dict entry is a tuple of the matching entries, which
+        # is shared by every lookup of that key.
         _trad_to = collections.defaultdict(list)
         _simp_to = collections.defaultdict(list)
         _pinyin_to = collections.defaultdict(list)
 
-        for index, entry in enumerate(self._dict):
-            _trad_to[entry.traditional].append(index)
-            _simp_to[entry.simplified].append(index)
-            _pinyin_to[entry.pinyin].append(index)
+        for entry in self._dict:
+            _trad_to[entry.traditional].append(entry)
+            _simp_to[entry.simplified].append(entry)
+            _pinyin_to[entry.pinyin].append(entry)
+
+        self._trad_to = {k: tuple(v) for k, v in _trad_to.items()}
+        self._simp_to = {k: tuple(v) for k, v in _simp_to.items()}
+        self._pinyin_to = {k: tuple(v) for k, v in _pinyin_to.items()}
+
+        # Sets of every prefix of every headword, built on first use
+        # by `is_prefix`.
+        self._prefixes = {}
+
+        # Script agnostic index covering both simplified and
+        # traditional headwords, built on first use.
+        self._any_to = None
+
+        self._lazy_index_lock = threading.RLock()
+        self._version = None
+
+    def diff(self, entries):
+        """Compare this dictionary with a new list of entries
+
+        Entries are matched by their cc-cedict line, so an edited entry
+        shows up as one removed and one added. Returns (added, removed)
+        lists of CeDictEntry objects.
+        """
+        entries = _as_entries(entries)
+        new_lines = {e.line for e in entries}
+        old_lines = {e.line for e in self._dict}
+        added = [e for e in entries if e.line not in old_lines]
+        removed = [e for e in self._dict if e.line not in new_lines]
+        return added, removed
+
+    def updated(self, entries):
+        """A new dictionary holding `entries`, e.g. a newer release
+
+        The same as building a CeDict from `entries`, but only index
+        keys whose entries changed are rebuilt. Everything else,
+        including the CeDictEntry objects of unchanged entries, is
+        shared with this dictionary, which is left as it was.
+        """
+        entries = _as_entries(entries)
+        added, removed = self.diff(entries)
+        return self._updated(entries, added, removed)
+
+    def _updated(self, entries, added, removed):
+        old_entries = {e.line: e for e in self._dict}
 
-        self._trad_to = dict(_trad_to)
-        self._simp_to = dict(_simp_to)
-        self._pinyin_to = dict(_pinyin_to)
+        cedict = self.__class__.__new__(self.__class__)
+        cedict.cc_cedict_path = self.cc_cedict_path
+        cedict._dict = tuple(old_entries.get(e.line, e) for e in entries)
+        if not added and not removed:
+            cedict._trad_to = self._trad_to
+            cedict._simp_to = self._simp_to
+            cedict._pinyin_to = self._pinyin_to
+        else:
+            # Keep each key's entries in the order of the new release,
+            # as a fresh build would.
+            position = {e.line: i for i, e in enumerate(cedict._dict)}
+            changed = added + removed
+            cedict._trad_to = _updated_index(
+                self._trad_to, "traditional", changed, added, position
+            )
+            cedict._simp_to = _updated_index(
+                self._simp_to, "simplified", changed, added, position
+            )
+            cedict._pinyin_to = _updated_index(
+                self._pinyin_to, "pinyin", changed, added, position
+            )
+        cedict._prefixes = {}
+        cedict._any_to = None
+        cedict._lazy_index_lock = threading.RLock()
+        cedict._version = None
+        return cedict
 
     @classmethod
     def _read_dict_file(cls, path):
-        raw_entries = cepy_dict.entries()
+        raw_entries = cepy_dict.entries(path)
         return [CeDictEntry(*e) for e in raw_entries]
 
+    def _index(self, kind):
+        if kind == "simplified":
+            return self._simp_to
+        elif kind == "traditional":
+            return self._trad_to
+        elif kind == "pinyin":
+            return self._pinyin_to
+        elif kind == "any":
+            if self._any_to is None:
+                with self._lazy_index_lock:
+                    if self._any_to is None:
+                        self._any_to = self._build_any_index()
+            return self._any_to
+        raise ValueError(f"Unknown lookup kind '{kind}'")
+
+    def _build_any_index(self):
+        # Simplified headwords win, so e.g. 著 finds 著 [zhu4] rather
+        # than also the traditional form of 着
+        _any_to = dict(self._trad_to)
+        _any_to.update(self._simp_to)
+        return _any_to
+
+    def entries(self):
+        return iter(self._dict)
+
+    @property
+    def version(self):
+        """A fingerprint of the dictionary contents, for keying caches"""
+        if self._version is None:
+            digest = hashlib.sha1()
+            for entry in self._dict:
+                digest.update(entry.line.encode("utf-8") + b"\n")
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    def lookup(self, key, kind="simplified"):
+        """Look up `key` in one of the indexes
+
+        kind - "simplified", "traditional", "pinyin" or "any", where
+               "any" matches simplified headwords, or traditional ones
+               if no simplified headword matches, in a single lookup.
+        """
+        entries = self._index(kind).get(key)
+        if entries is None:
+            return None
+        return list(entries)
+
+    def lookup_many(self, keys, kind="simplified"):
+        """Look up many keys at once
+
+        Returns a list with one item per key: a tuple of matching
+        entries, or None for a miss. The tuples are shared between
+        lookups and must not be relied on for identity.
+        """
+        get = self._index(kind).get
+        return [get(key) for key in keys]
+
     def lookup_simplified(self, simplified):
-        index = self._simp_to.get(simplified)
-        if index is None:
+        entries = self._simp_to.get(simplified)
+        if entries is None:
             return None
-        return [self._dict[i] for i in index]
+        return list(entries)
 
     def lookup_traditional(self, traditional):
-        index = self._trad_to.get(traditional)
-        if index is None:
+        entries = self._trad_to.get(traditional)
+        if entries is None:
             return None
-        return [self._dict[i] for i in index]
+        return list(entries)
 
     # TODO: pinyin normilization
     def lookup_pinyin(self, pinyin):
-        index = self._pinyin_to.get(pinyin)
-        if index is None:
+        entries = self._pinyin_to.get(pinyin)
+        if entries is None:
             return None
-        return [self._dict[i] for i in index]
+        return list(entries)
+
+    def is_word(self, text, kind="simplified"):
+        return text in self._index(kind)
+
+    def is_prefix(self, text, kind="simplified"):
+        """True if `text` is the start of (or all of) some headword"""
+        prefixes = self._prefixes.get(kind)
+        if prefixes is None:
+            with self._lazy_index_lock:
+                prefixes = self._prefixes.get(kind)
+                if prefixes is None:
+                    prefixes = frozenset(
+                        headword[:end]
+                        for headword in self._index(kind)
+                        for end in range(1, len(headword) + 1)
+                    )
+                    self._prefixes[kind] = prefixes
+        return text in prefixes
+
+
+class CeDictOverlay:
+    """A small set of changes to stack on top of another dictionary
+
+    add      - entries returned alongside the entries of lower layers
+    override - entries returned instead of the entries of lower layers
+               with the same simplified or traditional headword
+    hide     - headwords (simplified, traditional or pinyin) to hide.
+               An entry with any hidden headword is hidden from every
+               kind of lookup, in this layer and the ones below it.
+
+    Entries may be CeDictEntry objects or cc-cedict formatted lines.
+    """
+    def __init__(self, add=(), override=(), hide=()):
+        self.add = CeDict.from_entries(add)
+        self.override = CeDict.from_entries(override)
+        self.hide = frozenset(hide)
+        # Headwords whose lower entries are overridden, by script
+        self._overridden = (
+            frozenset(e.simplified for e in self.override.entries()),
+            frozenset(e.traditional for e in self.override.entries()),
+        )
+
+    @property
+    def version(self):
+        digest = hashlib.sha1()
+        for part in [self.add.version, self.override.version, *sorted(self.hide)]:
+            digest.update(part.encode("utf-8") + b"\n")
+        return digest.hexdigest()[:16]
+
+    def _hides(self, entry):
+        hide = self.hide
+        return bool(hide) and (
+            entry.simplified in hide
+            or entry.traditional in hide
+            or entry.pinyin in hide
+        )
+
+    def _replaces(self, entry):
+        """Whether an entry of a lower layer is overridden by this one"""
+        simplified, traditional = self._overridden
+        return entry.simplified in simplified or entry.traditional in traditional
+
+    def _stack(self, own, lower):
+        """The entries left visible with this overlay on top
+
+        own - entries from this overlay
+        lower - entries visible in the layers below it
+        """
+        entries = list(own) + [e for e in lower if not self._replaces(e)]
+        if self.hide:
+            entries = [e for e in entries if not self._hides(e)]
+        return entries
+
+    def __repr__(self):
+        return "<CeDictOverlay - {a} add / {o} override / {h} hide>".format(
+            a=len(self.add._dict),
+            o=len(self.override._dict),
+            h=len(self.hide),
+        )
+
+
+class LayeredCeDict:
+    """Overlay dictionaries stacked on a single shared base CeDict
+
+    Nothing in the base dictionary is copied, so any number of layered
+    dictionaries can share one base. Lookups find the key in each
+    layer (an O(1) check per layer) and drop the entries that the
+    overlays above hide or override. `lookup`, `is_word` and `entries`
+    all agree on what's visible.
+
+    overlays - CeDictOverlay objects, from the bottom layer to the top
+    """
+    def __init__(self, base, overlays=()):
+        self.base = base
+        self.overlays = tuple(overlays)
+
+    @property
+    def version(self):
+        digest = hashlib.sha1()
+        for part in [self.base.version, *(o.version for o in self.overlays)]:
+            digest.update(part.encode("utf-8") + b"\n")
+        return digest.hexdigest()[:16]
+
+    def with_overlay(self, overlay):
+        """A new layered dictionary with `overlay` on top of this one"""
+        return LayeredCeDict(self.base, self.overlays + (overlay,))
+
+    def entries(self):
+        """Every entry left visible once the overlays are applied"""
+        entries = list(self.base.entries())
+        for overlay in self.overlays:
+            own = [*overlay.override.entries(), *overlay.add.entries()]
+            entries = overlay._stack(own, entries)
+        return iter(entries)
+
+    def lookup(self, key, kind="simplified"):
+        if kind == "any":
+            # Simplified first across all the layers, see CeDict.lookup
+            return self.lookup(key, "simplified") or self.lookup(key, "traditional")
+        found = self.base.lookup(key, kind) or []
+        for overlay in self.overlays:
+            own = (
+                (overlay.override.lookup(key, kind) or [])
+                + (overlay.add.lookup(key, kind) or [])
+            )
+            found = overlay._stack(own, found)
+        return found or None
+
+    def lookup_many(self, keys, kind="simplified"):
+        """Look up many keys at once, see CeDict.lookup_many"""
+        found = [self.lookup(key, kind) for key in keys]
+        return [tuple(f) if f is not None else None for f in found]
+
+    def lookup_simplified(self, simplified):
+        return self.lookup(simplified, "simplified")
+
+    def lookup_traditional(self, traditional):
+        return self.lookup(traditional, "traditional")
+
+    def lookup_pinyin(self, pinyin):
+        return self.lookup(pinyin, "pinyin")
+
+    def is_word(self, text, kind="simplified"):
+        # The same as `lookup`, but segmenters call this a lot, so it
+        # stops at the first visible entry rather than finding them all
+        if kind == "any":
+            return self.is_word(text, "simplified") or self.is_word(text, "traditional")
+        above = []
+        for overlay in reversed(self.overlays):
+            if text in overlay.hide:
+                # Hides every entry found by `text`, here and below
+                return False
+            for layer in (overlay.override, overlay.add):
+                for entry in layer._index(kind).get(text, ()):
+                    if not overlay._hides(entry) and _visible_under(entry, above):
+                        return True
+            # Overlays that only add entries can't hide lower ones
+            if overlay.hide or overlay.override._dict:
+                above.append(overlay)
+        for entry in self.base._index(kind).get(text, ()):
+            if _visible_under(entry, above):
+                return True
+        return False
+
+    def is_prefix(self, text, kind="simplified"):
+        """True if `text` may be the start of some headword
+
+        Hidden headwords still count as prefixes. This only costs a
+        segmenter a few extra `is_word` checks.
+        """
+        return self.base.is_prefix(text, kind) or any(
+            o.add.is_prefix(text, kind) or o.override.is_prefix(text, kind)
+            for o in self.overlays
+        )
+
+def _visible_under(entry, overlays):
+    """Whether an entry is left visible with `overlays` above it"""
+    for overlay in overlays:
+        if overlay._hides(entry) or overlay._replaces(entry):
+            return False
+    return True
+
+
+def _as_entries(entries):
+    """CeDictEntry objects from entries or cc-cedict lines"""
+    return [
+        e if isinstance(e, CeDictEntry) else CeDictEntry.from_line(e)
+        for e in entries
+    ]
+
+
+def _updated_index(index, attribute, changed, added, position):
+    """Copy of `index` with the keys of `changed` entries rebuilt"""
+    updated = dict(index)
+    keys = {getattr(e, attribute) for e in changed}
+    added_by_key = collections.defaultdict(list)
+    for entry in added:
+        added_by_key[getattr(entry, attribute)].append(entry)
+    for key in keys:
+        kept = [e for e in index.get(key, ()) if e.line in position]
+        merged = sorted(kept + added_by_key[key], key=lambda e: position[e.line])
+        if merged:
+            updated[key] = tuple(merged)
+        else:
+            updated.pop(key, None)
+    return updated
+
+
+class _Subscribers:
+    """Callbacks to run after a change
+
+    Bound methods are held through weak references, so subscribing
+    an object (e.g. a StudyPlan to its Text) doesn't keep it alive.
+    Its callback is dropped once the object is garbage collected.
+    Other callables are held as given.
+    """
+    def __init__(self):
+        self._refs = []
+
+    def add(self, callback):
+        if isinstance(callback, types.MethodType):
+            self._refs.append(weakref.WeakMethod(callback))
+        else:
+            self._refs.append(lambda: callback)
+
+    def remove(self, callback):
+        self._refs = [ref for ref in self._refs if ref() != callback]
+
+    def __len__(self):
+        return sum(1 for ref in self._refs if ref() is not None)
+
+    def __call__(self, *args):
+        callbacks = [ref() for ref in self._refs]
+        self._refs = [
+            ref for ref, callback in zip(self._refs, callbacks)
+            if callback is not None
+        ]
+        for callback in callbacks:
+            if callback is not None:
+                callback(*args)
+
+
+class LiveCeDict:
+    """A CeDict that can be swapped for a newer release while in use
+
+    Lookups go to the current CeDict. `reload` (or `update`) builds the
+    next one aside, with `CeDict.updated` so only changed entries are
+    re-indexed, and then swaps it in with a single assignment. Every
+    lookup sees either the old dictionary or the new one, never a mix.
+
+    Caches of anything derived from the dictionary should be keyed on
+    `version`, or follow `subscribe`.
+    """
+    def __init__(self, cedict):
+        self.current = cedict
+        self._update_lock = threading.Lock()
+        self._subscribers = _Subscribers()
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def update(self, entries):
+        """Swap in a dictionary of `entries`, returning (added, removed)"""
+        entries = _as_entries(entries)
+        with self._update_lock:
+            old = self.current
+            added, removed = old.diff(entries)
+            new = old._updated(entries, added, removed)
+            self.current = new
+        self._subscribers(old, new)
+        return added, removed
+
+    def reload(self, path=None):
+        """Read a new release and swap it in, see `update`
+
+        path - the file to read. Defaults to the file the current
+               dictionary came from, or the packaged cc-cedict.
+        """
+        path = path or self.current.cc_cedict_path
+        return self.update(CeDict._read_dict_file(path))
+
+    def reload_in_background(self, path=None):
+        """Run `reload` on a daemon thread, returning the thread
+
+        Lookups carry on against the current dictionary meanwhile.
+        """
+        thread = threading.Thread(target=self.reload, args=(path,), daemon=True)
+        thread.start()
+        return thread
+
+    def subscribe(self, callback):
+        """Call `callback(old, new)` after every swap"""
+        self._subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def entries(self):
+        return self.current.entries()
+
+    def lookup(self, key, kind="simplified"):
+        return self.current.lookup(key, kind)
+
+    def lookup_many(self, keys, kind="simplified"):
+        return self.current.lookup_many(keys, kind)
+
+    def lookup_simplified(self, simplified):
+        return self.current.lookup_simplified(simplified)
+
+    def lookup_traditional(self, traditional):
+        return self.current.lookup_traditional(traditional)
+
+    def lookup_pinyin(self, pinyin):
+        return self.current.lookup_pinyin(pinyin)
+
+    def is_word(self, text, kind="simplified"):
+        return self.current.is_word(text, kind)
+
+    def is_prefix(self, text, kind="simplified"):
+        return self.current.is_prefix(text, kind)
+
+
+# A definition like "variant of ..." or "old variant of ...". The
+# qualifiers are words or parenthesised, e.g. "(literary) variant of".
+_VARIANT_PATTERN = re.compile(r"(?:\(?[\w ]+\)? )?variant of ")
 
 class CeDictEntry:
     @classmethod
@@ -103,10 +588,26 @@ class CeDictEntry:
     def serialize(self):
         return {}
 
-    @property
+    @functools.cached_property
     def unicode_pinyin(self):
-        # TODO implement this
-        return self.pinyin + "now with diacritics!"
+        return pin.number_to_diacritic(self.pinyin)
+
+    @functools.cached_property
+    def is_variant(self):
+        """Whether the entry only points at another way of writing it
+
+        e.g. "variant of 這裡|这里[zhe4 li3]" or "old variant of 裡|里[li3]"
+        """
+        return all(_VARIANT_PATTERN.match(d) for d in self.defs)
+
+    @classmethod
+    def unicode_pinyin_many(cls, entries):
+        """Render (and cache) the unicode pinyin of many entries at once"""
+        entries = list(entries)
+        rendered = pin.number_to_diacritic_many(e.pinyin for e in entries)
+        for entry, unicode_pinyin in zip(entries, rendered):
+            entry.__dict__["unicode_pinyin"] = unicode_pinyin
+        return rendered
 
 
 class KnowledgeBase:
@@ -125,6 +626,29 @@ class KnowledgeBase:
         self.words = set(
             words.split(delimeter)
         )
+        self._subscribers = _Subscribers()
+
+    def learn(self, characters="", words=()):
+        """Add newly learned characters and words
+
+        characters - string of chinese characters
+        words - iterable of words
+        """
+        new_characters = set(
+            c for c in characters
+            if unicodedata.category(c).startswith('L')
+        ) - self.characters
+        new_words = set(words) - self.words
+        self.characters |= new_characters
+        self.words |= new_words
+        self._subscribers(new_characters, new_words)
+
+    def subscribe(self, callback):
+        """Call `callback(new_characters, new_words)` after every `learn`"""
+        self._subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
 
     def know_char(self, char):
         if len(char.strip()) != 1:
@@ -136,9 +660,32 @@ class KnowledgeBase:
 
 
 class Text:
-    """A text in predominantly chinese"""
+    """A text in predominantly chinese
+
+    More text can be added to the end with `append`, e.g. for live
+    subtitles or chat. Frequencies that have already been computed are
+    then updated incrementally rather than recounted.
+    """
+
+    # How many characters at the end of the text may still segment
+    # differently once more text is appended. Should be longer than
+    # the longest dictionary word.
+    segmentation_window = 32
+
     def __init__(self, text):
-        self.text = text
+        # Appended chunks are only joined when the full text is needed
+        self._chunks = [text]
+        # Total length of the chunks
+        self._length = len(text)
+        self._character_frequency = None
+        self._segmentations = {}
+        self._subscribers = _Subscribers()
+
+    @property
+    def text(self):
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0]
 
     def __repr__(self):
         if len(self.text) > 40:
@@ -147,31 +694,341 @@ class Text:
             return f'Text("{self.text}")'
 
     def character_frequency(self):
-        frequency = collections.defaultdict(int)
-        for c in self.text:
-            cat = unicodedata.category(c)
-            if cat.lower().startswith('l'):
-                frequency[c] += 1
-        return dict(frequency)
-
-    def word_frequency(self, segmenter):
-        frequency = collections.defaultdict(int)
-        words, non_words = segmenter(self.text)
-        print(words, non_words)
-        for word in words:
-            frequency[word] += 1
-        return dict(frequency)
+        if self._character_frequency is None:
+            self._character_frequency = _character_counts(self.text)
+        return dict(self._character_frequency)
+
+    def word_frequency(self, segmenter, version=None):
+        """
+        version - the version of the dictionary `segmenter` segments
+                  with, e.g. `LiveCeDict.version`. Word frequencies
+                  counted with a different version are counted again.
+        """
+        segmentation = self._segmentations.get(segmenter)
+        if segmentation is None or version not in (None, segmentation.version):
+            segmentation = _IncrementalSegmentation(
+                segmenter, self.segmentation_window, version
+            )
+            segmentation.extend(self.text)
+            self._segmentations[segmenter] = segmentation
+        return dict(segmentation.frequency)
+
+    def load_corpus(self, corpus, segmenter, verify=True):
+        """Take frequencies from a pre-tokenized corpus of this text
+        instead of counting and segmenting it.
+
+        corpus - a TokenizedCorpus, see `cepy_tools.corpus`
+        segmenter - the segmenter the corpus was built with. Word
+                    frequencies for it come from the corpus.
+        verify - check the corpus was built from this text, which
+                 costs one hash of the text
+        """
+        if verify and not corpus.matches(self.text):
+            raise ValueError("Corpus was built from a different text")
+
+        tail_token = corpus.metadata["tail_token"]
+        tail_frequency = collections.Counter(corpus.tokens[tail_token:])
+        segmentation = _IncrementalSegmentation(
+            segmenter, corpus.metadata["window"], corpus.metadata["dictionary_version"]
+        )
+        segmentation.frequency = corpus.word_frequency()
+        segmentation.tail = self.text[corpus.metadata["tail_start"]:]
+        segmentation.tail_frequency = {
+            corpus.vocabulary[i]: n for i, n in tail_frequency.items()
+        }
+
+        self._character_frequency = corpus.character_frequency()
+        self._segmentations[segmenter] = segmentation
+
+    def approximate_character_frequency(self, capacity):
+        """Character frequency in fixed memory
+
+        Returns a SpaceSaving sketch tracking at most `capacity`
+        characters, see `cepy_tools.frequency_sketch`.
+        """
+        sketch = frequency_sketch.SpaceSaving(capacity)
+        sketch.update(
+            c for c in self.text
+            if unicodedata.category(c).lower().startswith('l')
+        )
+        return sketch
+
+    def approximate_word_frequency(self, segmenter, capacity):
+        """Word frequency in fixed memory
+
+        The text is segmented a block at a time, and the words are
+        counted by a SpaceSaving sketch tracking at most `capacity`
+        words.
+        """
+        sketch = frequency_sketch.SpaceSaving(capacity)
+        sketch.update(_stream_words(self.text, segmenter, self.segmentation_window))
+        return sketch
+
+    def append(self, chunk):
+        """Add `chunk` to the end of the text
+
+        Only `chunk` and a short window before it are counted and
+        segmented again. Returns the change in character frequency and
+        a dict of the change in word frequency for each segmenter used
+        so far, which are also passed to any subscribers.
+        """
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        char_delta = _character_counts(chunk)
+        if self._character_frequency is not None:
+            _apply_delta(self._character_frequency, char_delta)
+
+        word_deltas = {
+            segmenter: segmentation.extend(chunk)
+            for segmenter, segmentation in self._segmentations.items()
+        }
+
+        self._subscribers(char_delta, word_deltas)
+        return char_delta, word_deltas
+
+    def subscribe(self, callback):
+        """Call `callback(char_delta, word_deltas)` after every append"""
+        self._subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+
+def _character_counts(text):
+    frequency = collections.defaultdict(int)
+    for c in text:
+        cat = unicodedata.category(c)
+        if cat.lower().startswith('l'):
+            frequency[c] += 1
+    return dict(frequency)
+
+
+def _apply_delta(frequency, delta):
+    """Add a change in counts to a frequency dict in place"""
+    for key, change in delta.items():
+        count = frequency.get(key, 0) + change
+        if count > 0:
+            frequency[key] = count
+        else:
+            frequency.pop(key, None)
+
+
+class _IncrementalSegmentation:
+    """Word frequencies for a text that only grows at the end
+
+    Assumes the segmenter works left to right like `greedy`: where a
+    word starts depends only on the text from that point on, and only
+    on the next `window` characters of it. Everything before the last
+    word boundary that is at least `window` characters from the end is
+    final. Only the text after it (the tail) is segmented again.
+
+    `version` is the version of the dictionary the segmenter used, if
+    known.
+    """
+    def __init__(self, segmenter, window, version=None):
+        self.segmenter = segmenter
+        self.window = window
+        self.version = version
+        self.frequency = {}
+        self.tail = ""
+        self.tail_frequency = {}
+
+    def extend(self, chunk):
+        """Segment `chunk` onto the end, returning the change in word
+        frequency."""
+        text = self.tail + chunk
+        words, _non_words = self.segmenter(text)
+        commit, starts = ws.stable_boundary(text, words, self.window)
+        tail_index = bisect.bisect_left(starts, commit)
+
+        if isinstance(words, ws.Tokens):
+            # Count vocabulary IDs, not words
+            frequency = words.frequency()
+            tail_frequency = words.frequency(tail_index)
+        else:
+            frequency = collections.Counter(words)
+            tail_frequency = collections.Counter(words[tail_index:])
+        delta = collections.Counter(frequency)
+        delta.subtract(self.tail_frequency)
+        delta = {w: c for w, c in delta.items() if c != 0}
+
+        _apply_delta(self.frequency, delta)
+        self.tail = text[commit:]
+        self.tail_frequency = dict(tail_frequency)
+        return delta
+
+
+def _stream_words(text, segmenter, window, block_size=65536):
+    """Segment `text` a block at a time, yielding the same words as
+    `segmenter(text)` without holding them all in memory."""
+    tail = ""
+    for block_start in range(0, len(text), block_size):
+        tail += text[block_start:block_start + block_size]
+        words, _non_words = segmenter(tail)
+        commit, starts = ws.stable_boundary(tail, words, window)
+        yield from itertools.islice(words, bisect.bisect_left(starts, commit))
+        tail = tail[commit:]
+    if tail:
+        words, _non_words = segmenter(tail)
+        yield from words
+
+
+class SentenceIndex:
+    """The sentences of a text, indexed by the words in them
+
+    Also tracks how many words in each sentence aren't in a knowledge
+    base, so "i+1" sentences (where a word is the only unknown word)
+    can be found without rescanning the text. The counts follow the
+    knowledge base as words are learned through `KnowledgeBase.learn`,
+    and the sentences follow the text as it's appended to.
+    """
+    def __init__(self, text, segmenter, kb):
+        self.kb = kb
+        self.segmenter = segmenter
+        self.sentences = []
+
+        # word -> ids of the sentences it appears in
+        self._sentences_with = {}
+        # sentence id -> the distinct words in it
+        self._words_in = []
+        # sentence id -> number of distinct unknown words in it
+        self._unknown_count = array.array("I")
+        # word -> ids of sentences where it's the only unknown word
+        self._i_plus_one = collections.defaultdict(set)
+        self._unknown = set()
+        # The text from the start of the last sentence, which may
+        # still grow (or split) as text is appended
+        self._tail = ""
+        self._text = text
+        self._length = text._length
+
+        self._add_text(text.text)
+
+        kb.subscribe(self._kb_learned)
+        text.subscribe(self._text_appended)
+
+    def _add_text(self, text):
+        sentences = ws.split_sentences(text)
+        for sentence in sentences:
+            words, _non_words = self.segmenter(sentence)
+            self._add_sentence(sentence, words)
+        self._tail = text[text.rindex(sentences[-1]):] if sentences else text
+
+    def _add_sentence(self, sentence, words):
+        sentence_id = len(self.sentences)
+        distinct = tuple(dict.fromkeys(words))
+        unknown = [w for w in distinct if not self.kb.know_word(w)]
+        self.sentences.append(sentence)
+        self._words_in.append(distinct)
+        self._unknown_count.append(len(unknown))
+        self._unknown.update(unknown)
+        for word in distinct:
+            self._sentences_with.setdefault(word, []).append(sentence_id)
+        if len(unknown) == 1:
+            self._i_plus_one[unknown[0]].add(sentence_id)
+
+    def _remove_last_sentence(self):
+        sentence_id = len(self.sentences) - 1
+        for word in self._words_in[sentence_id]:
+            ids = self._sentences_with[word]
+            ids.pop()
+            if not ids:
+                del self._sentences_with[word]
+            ids = self._i_plus_one.get(word)
+            if ids is not None:
+                ids.discard(sentence_id)
+                if not ids:
+                    del self._i_plus_one[word]
+        self.sentences.pop()
+        self._words_in.pop()
+        self._unknown_count.pop()
+
+    def _text_appended(self, char_delta, word_deltas):
+        # Take the new text from the end of the last chunk, rather than
+        # joining the whole text on every append
+        added = self._text._length - self._length
+        chunk = self._text._chunks[-1][-added:] if added else ""
+        self._length += added
+        if self._tail.strip():
+            self._remove_last_sentence()
+        self._add_text(self._tail + chunk)
+
+    def _kb_learned(self, new_characters, new_words):
+        # Learning a character can make a single character word known
+        for word in new_characters | new_words:
+            if word not in self._unknown or not self.kb.know_word(word):
+                continue
+            self._unknown.discard(word)
+            self._i_plus_one.pop(word, None)
+            for sentence_id in self._sentences_with.get(word, ()):
+                self._unknown_count[sentence_id] -= 1
+                if self._unknown_count[sentence_id] == 1:
+                    last_unknown = next(
+                        w for w in self._words_in[sentence_id]
+                        if w in self._unknown
+                    )
+                    self._i_plus_one[last_unknown].add(sentence_id)
+
+    def sentences_with(self, word):
+        return [self.sentences[i] for i in self._sentences_with.get(word, ())]
+
+    def unknown_count(self, sentence_id):
+        return self._unknown_count[sentence_id]
+
+    def i_plus_one(self, word):
+        """Sentences where `word` is the only unknown word"""
+        return [self.sentences[i] for i in sorted(self._i_plus_one.get(word, ()))]
 
 
 class StudyPlan:
-    def __init__(self, text, kb, cedict, segmenter):
-        self.text = text
+    def __init__(self, text, kb, cedict, segmenter, capacity=None, follow=True):
+        """
+        segmenter - segments with `cedict`. Word frequencies are counted
+                    again whenever `cedict.version` changes.
+        capacity - If given, count frequencies approximately in fixed
+                   memory, tracking only the `capacity` most frequent
+                   characters and words. Coverage numbers in the plan
+                   then come with error bars.
+        follow - Update the plan as text is appended to `text`
+        """
         self.kb = kb
         self.cedict = cedict
         self.segmenter = segmenter
+        self.capacity = capacity
+        self._count(text)
 
-        self.character_frequency = text.character_frequency()
-        self.word_frequency = text.word_frequency(self.segmenter)
+        # Stay up to date as text is appended. Approximate counts
+        # can't be updated in place, so those plans stay as they are.
+        # The text only holds a weak reference to the plan.
+        if capacity is None and follow:
+            text.subscribe(self._text_appended)
+
+    def _count(self, text):
+        """Count the frequencies of `text` and what's new in them"""
+        self.text = text
+        kb = self.kb
+        self._dictionary_version = self.cedict.version
+        if self.capacity is None:
+            self.character_frequency = text.character_frequency()
+            self.word_frequency = text.word_frequency(
+                self.segmenter, self._dictionary_version
+            )
+            self.frequency_errors = None
+            total_char = sum(self.character_frequency.values())
+            total_word = sum(self.word_frequency.values())
+        else:
+            char_sketch = text.approximate_character_frequency(self.capacity)
+            word_sketch = text.approximate_word_frequency(self.segmenter, self.capacity)
+            self.character_frequency = char_sketch.counts()
+            self.word_frequency = word_sketch.counts()
+            # How much each count may be overestimated
+            self.frequency_errors = {
+                "char": char_sketch.errors(),
+                "word": word_sketch.errors(),
+            }
+            total_char = char_sketch.total
+            total_word = word_sketch.total
 
         self.new_characters = {
             char: freq for char, freq in self.character_frequency.items()
@@ -181,24 +1038,135 @@ class StudyPlan:
             word: freq for word, freq in self.word_frequency.items()
             if not kb.know_word(word)
         }
+        self._total_char = total_char
+        self._total_word = total_word
+        self._new_total_char = sum(self.new_characters.values())
+        self._new_total_word = sum(self.new_words.values())
 
-    def plan(self):
+        # Coverage tables by text type, built on first use. See
+        # `_coverage_table`.
+        self._coverage_tables = {}
+        self._sentence_index = None
+
+    def _text_appended(self, char_delta, word_deltas):
+        if self.cedict.version != self._dictionary_version:
+            # The dictionary changed (e.g. a LiveCeDict swapped in a new
+            # release), so the old counts can't be carried forward
+            self._count(self.text)
+            return
+        word_delta = word_deltas.get(self.segmenter, {})
+        new_char_delta = {
+            c: n for c, n in char_delta.items() if not self.kb.know_char(c)
+        }
+        new_word_delta = {
+            w: n for w, n in word_delta.items() if not self.kb.know_word(w)
+        }
+        _apply_delta(self.character_frequency, char_delta)
+        _apply_delta(self.new_characters, new_char_delta)
+        _apply_delta(self.word_frequency, word_delta)
+        _apply_delta(self.new_words, new_word_delta)
+        self._total_char += sum(char_delta.values())
+        self._total_word += sum(word_delta.values())
+        self._new_total_char += sum(new_char_delta.values())
+        self._new_total_word += sum(new_word_delta.values())
+        self._coverage_tables = {}
+
+    def _coverage_table(self, text_type):
+        """New vocabulary ranked by frequency, with cumulative counts
+
+        Returns (vocabulary, cumulative, total). `vocabulary` is a tuple
+        of the new words (or characters), most frequent first, so a
+        vocabulary ID is a position in it. `cumulative[n]` is the count
+        of text understood after learning the first n of them.
+        """
+        table = self._coverage_tables.get(text_type)
+        if table is not None:
+            return table
+
+        if text_type == "word":
+            new = self.new_words
+        elif text_type == "char":
+            new = self.new_characters
+        else:
+            raise ValueError(f"Unknown text type '{text_type}'")
+
+        # Ties go to the word itself, so the order doesn't depend on how
+        # the text was counted (e.g. all at once or as it was appended)
+        vocabulary = tuple(sorted(new, key=lambda v: (-new[v], v)))
+        counts = array.array("q", (new[v] for v in vocabulary))
+        total = self._total_word if text_type == "word" else self._total_char
+        known = total - sum(counts)
+        cumulative = array.array("q", itertools.accumulate(counts, initial=known))
+
+        table = (vocabulary, cumulative, total)
+        self._coverage_tables[text_type] = table
+        return table
+
+    def coverage_curve(self, text_type="word"):
+        """Coverage of the text after learning the n most frequent new
+        words (or characters, with text_type="char"), for every n.
+
+        curve[0] is the coverage from current knowledge alone.
+        """
+        _vocabulary, cumulative, total = self._coverage_table(text_type)
+        if total == 0:
+            return array.array("d", [0] * len(cumulative))
+        return array.array("d", (c / total for c in cumulative))
+
+    def count_for_coverage(self, coverage, text_type="word"):
+        """How many new words (or characters) must be learned, most
+        frequent first, to reach `coverage` (e.g. 0.95) of the text.
+
+        Returns None if the coverage can't be reached.
+        """
+        _vocabulary, cumulative, total = self._coverage_table(text_type)
+        needed = bisect.bisect_left(cumulative, coverage * total - 1e-9)
+        return needed if needed < len(cumulative) else None
+
+    def vocabulary_for_coverage(self, coverage, text_type="word"):
+        """The new words (or characters) to learn to reach `coverage`"""
+        vocabulary, _cumulative, _total = self._coverage_table(text_type)
+        needed = self.count_for_coverage(coverage, text_type)
+        return None if needed is None else list(vocabulary[:needed])
+
+    def plan(self, top_n=None):
         """List the characters and words needed to understand a given
-        cumulative percentage of the text."""
+        cumulative percentage of the text.
+
+        top_n - Only plan the `top_n` most frequent new words
+
+        With approximate frequencies (see `capacity`) each entry's
+        `char_error` and `word_error` bound how far its cumulative
+        coverage may be off in either direction. Counts of tracked
+        words are overestimated by at most their errors, which is too
+        high for words counted as understood. Known words that weren't
+        tracked are missed, which is too low by at most the errors of
+        the tracked words not yet counted.
+        """
         plan = []
         newly_learned_characters = set()
 
         def pct_known(count, total):
             return count / total if total > 0 else 0
 
-        known_char_count = sum([
-            f for c, f in self.character_frequency.items()
-            if self.kb.know_char(c)
-        ])
-        known_word_count = sum([
-            f for w, f in self.word_frequency.items()
-            if self.kb.know_word(w)
-        ])
+        errors = self.frequency_errors or {"char": {}, "word": {}}
+        char_errors, word_errors = errors["char"], errors["word"]
+        all_char_error = sum(char_errors.values())
+        all_word_error = sum(word_errors.values())
+
+        def pct_error(counted_error, all_error, total):
+            return pct_known(max(counted_error, all_error - counted_error), total)
+
+        known_chars = [
+            c for c in self.character_frequency if self.kb.know_char(c)
+        ]
+        known_words = [
+            w for w in self.word_frequency if self.kb.know_word(w)
+        ]
+        known_char_count = sum(self.character_frequency[c] for c in known_chars)
+        known_word_count = sum(self.word_frequency[w] for w in known_words)
+        char_error = sum(char_errors.get(c, 0) for c in known_chars)
+        word_error = sum(word_errors.get(w, 0) for w in known_words)
         total_word = self.total_words()
         total_char = self.total_characters()
         base_entry = PlanEntry(
@@ -208,31 +1176,37 @@ class StudyPlan:
             text = "X",
             text_type = "word",
             definitions = [CeDictEntry.empty("<Current Knowledge>")],
+            char_error = pct_error(char_error, all_char_error, total_char),
+            word_error = pct_error(word_error, all_word_error, total_word),
         )
         plan.append(base_entry)
 
-        snd = lambda x: x[1]
-        for word, freq in sorted(self.new_words.items(), key=snd, reverse=True):
+        # Most frequent first, ties broken as in `_coverage_table`
+        new_words = sorted(self.new_words.items(), key=lambda x: (-x[1], x[0]))
+        for word, freq in new_words[:top_n]:
             unknown_word_characters = [
                 c for c in word
                 if not self.kb.know_char(c) and c not in newly_learned_characters
             ]
             for char in unknown_word_characters:
-                known_char_count += self.character_frequency[char]
+                known_char_count += self.character_frequency.get(char, 0)
+                char_error += char_errors.get(char, 0)
                 newly_learned_characters.add(char)
                 plan.append(PlanEntry(
-                    count = self.character_frequency[char],
+                    count = self.character_frequency.get(char, 0),
                     cumulative_char = pct_known(known_char_count, total_char),
                     cumulative_word = pct_known(known_word_count, total_word),
                     text = char,
                     text_type = "char",
                     definitions = (
-                        self.cedict.lookup_simplified(char)
-                        or self.cedict.lookup_traditional(char)
+                        self.cedict.lookup(char, "any")
                         or [CeDictEntry.empty()]
-                    )
+                    ),
+                    char_error = pct_error(char_error, all_char_error, total_char),
+                    word_error = pct_error(word_error, all_word_error, total_word),
                 ))
             known_word_count += freq
+            word_error += word_errors.get(word, 0)
             plan.append(PlanEntry(
                 count = freq,
                 cumulative_char = pct_known(known_char_count, total_char),
@@ -240,21 +1214,28 @@ class StudyPlan:
                 text = word,
                 text_type = "word",
                 definitions = (
-                    self.cedict.lookup_simplified(word)
-                    or self.cedict.lookup_traditional(word)
+                    self.cedict.lookup(word, "any")
                     or [CeDictEntry.empty()]
-                )
+                ),
+                char_error = pct_error(char_error, all_char_error, total_char),
+                word_error = pct_error(word_error, all_word_error, total_word),
             ))
         return plan
 
+    def sentence_index(self):
+        """A SentenceIndex of the text, for finding example sentences"""
+        if self._sentence_index is None:
+            self._sentence_index = SentenceIndex(self.text, self.segmenter, self.kb)
+        return self._sentence_index
+
     def total_characters(self):
-        return sum(self.character_frequency.values())
+        return self._total_char
 
     def unique_characters(self):
         return len(self.character_frequency)
 
     def total_words(self):
-        return sum(self.word_frequency.values())
+        return self._total_word
 
     def unique_words(self):
         return len(self.word_frequency)
@@ -264,7 +1245,7 @@ class StudyPlan:
         stats["total_char"] = self.total_characters()
         stats["unique_char"] = self.unique_characters()
         stats["new_unique_char"] = len(self.new_characters)
-        stats["new_total_char"] = sum(self.new_characters.values())
+        stats["new_total_char"] = self._new_total_char
         stats["pct_new_char_total"] = (
             stats["new_total_char"] / stats["total_char"]
             if stats["total_char"] > 0 else 0
@@ -276,7 +1257,7 @@ class StudyPlan:
         stats["total_word"] = self.total_words()
         stats["unique_word"] = self.unique_words()
         stats["new_unique_word"] = len(self.new_words)
-        stats["new_total_word"] = sum(self.new_words.values())
+        stats["new_total_word"] = self._new_total_word
         stats["pct_new_word_total"] = (
             stats["new_total_word"] / stats["total_word"]
             if stats["total_word"] > 0 else 0
@@ -302,21 +1283,123 @@ class StudyPlan:
         return textwrap.dedent(text).strip()
 
 
+def coverage_many(text, kbs, segmenter):
+    """Current coverage of one text for many knowledge bases
+
+    The text is only counted and segmented once. Returns a list with
+    a {"char": ..., "word": ...} coverage dict for each knowledge base.
+    """
+    tables = {}
+    for text_type, frequency in [
+            ("char", text.character_frequency()),
+            ("word", text.word_frequency(segmenter)),
+    ]:
+        vocabulary = tuple(frequency)
+        counts = array.array("q", frequency.values())
+        tables[text_type] = (vocabulary, counts, sum(counts))
+
+    coverages = []
+    for kb in kbs:
+        coverage = {}
+        for text_type, know in [("char", kb.know_char), ("word", kb.know_word)]:
+            vocabulary, counts, total = tables[text_type]
+            known = sum(itertools.compress(counts, map(know, vocabulary)))
+            coverage[text_type] = known / total if total > 0 else 0
+        coverages.append(coverage)
+    return coverages
+
+
+class ReadingPlan:
+    """Study plans for a text read front to back, one section (e.g. a
+    chapter or episode) at a time.
+
+    For each section, plans the fewest new words (most frequent first)
+    needed to understand `coverage` of that section's words, counting
+    everything planned for earlier sections as known. Only the section
+    itself is counted and segmented, so each section costs time in
+    proportion to its own length no matter how far into the text it is.
+    """
+    def __init__(self, sections, kb, cedict, segmenter, coverage=0.95):
+        """
+        sections - iterable of strings or Text objects, in reading order
+        """
+        self.sections = sections
+        self.kb = kb
+        self.cedict = cedict
+        self.segmenter = segmenter
+        self.coverage = coverage
+
+    def plan(self):
+        """Yield a list of PlanEntry objects for each section"""
+        knowledge = _LearnedKnowledge(self.kb)
+        planner = None
+        for section in self.sections:
+            text = section if isinstance(section, Text) else Text(section)
+            # One planner moves from section to section, and doesn't
+            # follow appends to any of them
+            if planner is None:
+                planner = StudyPlan(
+                    text, knowledge, self.cedict, self.segmenter, follow=False
+                )
+            else:
+                planner._count(text)
+            needed = planner.count_for_coverage(self.coverage)
+            entries = planner.plan(top_n=needed)
+            for entry in entries[1:]:
+                if entry.text_type == "char":
+                    knowledge.characters.add(entry.text)
+                else:
+                    knowledge.words.add(entry.text)
+            yield entries
+
+
+class _LearnedKnowledge:
+    """A knowledge base plus what's been planned so far, without
+    copying the knowledge base"""
+    def __init__(self, kb):
+        self.kb = kb
+        self.characters = set()
+        self.words = set()
+
+    def know_char(self, char):
+        return char.strip() in self.characters or self.kb.know_char(char)
+
+    def know_word(self, word):
+        return (
+            word.strip() in self.words
+            or word.strip() in self.characters
+            or self.kb.know_word(word)
+        )
+
+
 class PlanEntry:
-    def __init__(self, count, cumulative_char, cumulative_word, text, text_type, definitions):
+    def __init__(self, count, cumulative_char, cumulative_word, text, text_type, definitions,
+                 char_error=0, word_error=0):
         self.count = count
         self.cumulative_char = cumulative_char
         self.cumulative_word = cumulative_word
         self.text = text
         self.text_type = text_type
         self.definitions = definitions
+        # How far the cumulative coverage may be off when planned from
+        # approximate frequencies
+        self.char_error = char_error
+        self.word_error = word_error
+
+    def fmt_coverage(self):
+        cw = f"{self.cumulative_word:.0%}"
+        if self.word_error:
+            cw += f"±{self.word_error:.0%}"
+        cc = f"{self.cumulative_char:.0%}"
+        if self.char_error:
+            cc += f"±{self.char_error:.0%}"
+        return f"[w: {cw} / c:{cc}]"
 
     def fmt_one_line(self):
         all_pinyin = ";".join(d.pinyin for d in self.definitions)
         all_definitions = "] ;; [".join(" / ".join(d.defs) for d in self.definitions)
-        return "[w: {cw:.0%} / c:{cc:.0%}] <{n}> {txt}{tt} ({pin}) :: [{dfn}]".format(
-            cw = self.cumulative_word,
-            cc = self.cumulative_char,
+        return "{cov} <{n}> {txt}{tt} ({pin}) :: [{dfn}]".format(
+            cov = self.fmt_coverage(),
             n = self.count,
             txt = self.text,
             tt = "*" if self.text_type == "char" else "",
@@ -326,9 +1409,8 @@ class PlanEntry:
 
     def fmt_multi_line(self):
         all_pinyin = ";".join(d.pinyin for d in self.definitions)
-        header = "[w: {cw:.0%} / c:{cc:.0%}] <{n}> {txt}{tt} ({pin}) ::\n".format(
-            cw = self.cumulative_word,
-            cc = self.cumulative_char,
+        header = "{cov} <{n}> {txt}{tt} ({pin}) ::\n".format(
+            cov = self.fmt_coverage(),
             n = self.count,
             txt = self.text,
             tt = "*" if self.text_type == "char" else "",
@@ -341,7 +1423,8 @@ class PlanEntry:
         return f"{header}{defs}"
 
     @cepy_serial.class_serializer(
-        "count", "cumulative_char", "cumulative_word", "text", "text_type"
+        "count", "cumulative_char", "cumulative_word", "text", "text_type",
+        "char_error", "word_error",
     )
     def serialize(self):
         return { "definitions": [d.serialize() for d in self.definitions] }
@@ -0,0 +1,242 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import array
+import bisect
+import collections
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import unicodedata
+
+import cepy_tools.word_segmentation as ws
+
+"""
+Pre-tokenized corpora.
+
+Segmenting a long text is by far the slowest part of planning. A
+TokenizedCorpus stores a text once segmented: an array of vocabulary
+IDs, one per word, and the token offset where each sentence starts.
+It's keyed by a hash of the text, the dictionary version and the name
+of the segmenter, so a stale corpus is never used by mistake.
+
+File layout:
+  - b"CEPYTOK1"
+  - metadata length (uint32, little endian) and the metadata as JSON
+  - padding to a multiple of 4 bytes
+  - token vocabulary IDs (uint32, one per word)
+  - sentence start offsets into the tokens (uint32, one per sentence)
+
+Loaded corpora are memory mapped, so the token arrays are read
+straight from the page cache rather than copied.
+"""
+
+MAGIC = b"CEPYTOK1"
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _segmenter_name(segmenter, segmenter_name):
+    """The name to key `segmenter` by
+
+    Lambdas, nested functions and partials have no name that tells
+    them apart from another segmenter, so they have to be named.
+    """
+    if segmenter_name:
+        return segmenter_name
+    qualname = getattr(segmenter, "__qualname__", None)
+    if qualname is None or "<lambda>" in qualname or "<locals>" in qualname:
+        raise ValueError(
+            f"Can't key a corpus by segmenter {segmenter!r}, pass segmenter_name"
+        )
+    return qualname
+
+
+class TokenizedCorpus:
+    def __init__(self, metadata, tokens, sentence_starts, mapped=None):
+        self.metadata = metadata
+        self.vocabulary = tuple(metadata["vocabulary"])
+        self.tokens = tokens
+        self.sentence_starts = sentence_starts
+        self._mapped = mapped
+
+    @classmethod
+    def build(cls, text, segmenter, dictionary_version, segmenter_name=None,
+              window=32):
+        """Segment `text` once and store it as token IDs
+
+        dictionary_version - version of the dictionary the segmenter
+                             uses, e.g. `CeDict.version`
+        segmenter_name - name to key the segmenter by. Defaults to the
+                         segmenter function's qualified name, and is
+                         required for lambdas and nested functions.
+        window - see `Text.segmentation_window`
+        """
+        segmenter_name = _segmenter_name(segmenter, segmenter_name)
+        words, _non_words = segmenter(text)
+        starts = ws.word_starts(text, words)
+        if starts is None:
+            raise ValueError("Segmenter output doesn't match the text")
+
+        if isinstance(words, ws.Tokens):
+            vocabulary, tokens = words.vocabulary, words.ids
+        else:
+            vocabulary = {}
+            tokens = array.array("I", (
+                vocabulary.setdefault(w, len(vocabulary)) for w in words
+            ))
+
+        sentence_starts = array.array("I")
+        char_pos = 0
+        for sentence in ws.split_sentences(text):
+            char_pos = text.index(sentence, char_pos)
+            sentence_starts.append(bisect.bisect_left(starts, char_pos))
+            char_pos += len(sentence)
+
+        tail_start, _starts = ws.stable_boundary(text, words, window)
+        character_frequency = collections.Counter(
+            c for c in text if unicodedata.category(c).lower().startswith('l')
+        )
+        metadata = {
+            "text_hash": text_hash(text),
+            "dictionary_version": dictionary_version,
+            "segmenter": segmenter_name,
+            "vocabulary": list(vocabulary),
+            "character_frequency": dict(character_frequency),
+            "token_count": len(tokens),
+            "sentence_count": len(sentence_starts),
+            # Where the text may segment differently once appended to,
+            # see `Text.append`
+            "tail_start": tail_start,
+            "tail_token": bisect.bisect_left(starts, tail_start),
+            "window": window,
+        }
+        return cls(metadata, tokens, sentence_starts)
+
+    def save(self, path):
+        header = json.dumps(self.metadata, ensure_ascii=False).encode("utf-8")
+        padding = b"\0" * (-(len(MAGIC) + 4 + len(header)) % 4)
+        tokens, sentence_starts = (
+            array.array("I", self.tokens), array.array("I", self.sentence_starts)
+        )
+        if sys.byteorder != "little":
+            tokens.byteswap()
+            sentence_starts.byteswap()
+
+        # Write then rename so readers never see a half written file.
+        # The temporary file has a unique name, so processes saving the
+        # same corpus at once don't write over each other.
+        directory, name = os.path.split(os.fspath(path))
+        fd, partial = tempfile.mkstemp(
+            prefix=f".{name}.", suffix=".partial", dir=directory or "."
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.write(padding)
+                tokens.tofile(f)
+                sentence_starts.tofile(f)
+            os.replace(partial, path)
+        except BaseException:
+            os.unlink(partial)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Memory map a saved corpus"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"'{path}' is not a tokenized corpus")
+
+        (header_length,) = struct.unpack_from("<I", mapped, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        metadata = json.loads(mapped[header_start:header_start + header_length])
+        offset = header_start + header_length
+        offset += -offset % 4
+
+        token_bytes = 4 * metadata["token_count"]
+        sentence_bytes = 4 * metadata["sentence_count"]
+        view = memoryview(mapped)
+        tokens = view[offset:offset + token_bytes].cast("I")
+        sentence_starts = view[
+            offset + token_bytes:offset + token_bytes + sentence_bytes
+        ].cast("I")
+        if sys.byteorder != "little":
+            tokens, sentence_starts = array.array("I", tokens), array.array("I", sentence_starts)
+            tokens.byteswap()
+            sentence_starts.byteswap()
+        return cls(metadata, tokens, sentence_starts, mapped)
+
+    @classmethod
+    def load_or_build(cls, directory, text, segmenter, dictionary_version,
+                      segmenter_name=None, window=32):
+        """Load the corpus for this text, dictionary and segmenter from
+        `directory`, building and saving it first if there isn't one.
+
+        See `build` for `segmenter_name`.
+        """
+        segmenter_name = _segmenter_name(segmenter, segmenter_name)
+        key = hashlib.sha256("\n".join([
+            text_hash(text), dictionary_version, segmenter_name, str(window)
+        ]).encode("utf-8")).hexdigest()
+        path = os.path.join(directory, f"{key}.cepytok")
+        if not os.path.exists(path):
+            cls.build(
+                text, segmenter, dictionary_version, segmenter_name, window
+            ).save(path)
+        return cls.load(path)
+
+    def close(self):
+        if self._mapped is not None:
+            self.tokens.release()
+            self.sentence_starts.release()
+            self._mapped.close()
+            self._mapped = None
+
+    def matches(self, text, dictionary_version=None, segmenter_name=None):
+        """True if this corpus was built from `text` (and the given
+        dictionary version and segmenter, if any)"""
+        return (
+            self.metadata["text_hash"] == text_hash(text)
+            and dictionary_version in (None, self.metadata["dictionary_version"])
+            and segmenter_name in (None, self.metadata["segmenter"])
+        )
+
+    def word_frequency(self):
+        counts = collections.Counter(self.tokens)
+        return {self.vocabulary[i]: n for i, n in counts.items()}
+
+    def character_frequency(self):
+        return dict(self.metadata["character_frequency"])
+
+    def sentence_words(self, sentence_id):
+        start = self.sentence_starts[sentence_id]
+        end = (
+            self.sentence_starts[sentence_id + 1]
+            if sentence_id + 1 < len(self.sentence_starts)
+            else len(self.tokens)
+        )
+        return [self.vocabulary[i] for i in self.tokens[start:end]]
@@ -0,0 +1,341 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import contextlib
+import importlib
+import math
+import random
+import signal
+import sys
+import threading
+
+import cepy_tools.cepy as cepy
+import cepy_tools.pinyin as pin
+import cepy_tools.word_segmentation as ws
+
+"""
+Differential testing of faster implementations against current ones.
+
+A candidate implementation is run on the same randomized inputs as
+the current (reference) one, and every input where their outputs
+differ (or only one of them raises) is shrunk to a minimal input that
+still shows the difference.
+
+Targets, and the signature a candidate for each must have:
+  - "normalize_pinyin": candidate(pinyin) like `pinyin.normalize_pinyin`
+  - "segment_pinyin": candidate(pinyin) like `pinyin.segment_pinyin`
+  - "greedy": candidate(text, is_word) like `word_segmentation.greedy`
+  - "plan": candidate(text, kb, cedict, segmenter) returning an object
+            with a `plan()` method, like `cepy.StudyPlan`
+
+Run from the command line with the dotted path of a candidate:
+
+    python -m cepy_tools.differential greedy mypackage.fast:greedy --runs 5000
+
+Without a candidate, the fast paths already in cepy-tools are checked
+(e.g. greedy's token output and plans built from appended text).
+"""
+
+LATIN_WORDS = ["Jane", "Doe", "TF", "AA", "Python", "3", "2025", "OK"]
+PUNCTUATION = [" ", "  ", "'", "’", "-", ".", ",", "，", "。", "！", "?", "“", "”", "\n"]
+
+
+class Divergence:
+    def __init__(self, input, minimized, expected, actual):
+        self.input = input
+        self.minimized = minimized
+        self.expected = expected
+        self.actual = actual
+
+    def __repr__(self):
+        return f"<Divergence - {self.minimized!r}>"
+
+    def __str__(self):
+        return "\n".join([
+            f"input:     {self.minimized!r}",
+            f"reference: {self.expected!r}",
+            f"candidate: {self.actual!r}",
+            f"(shrunk from {self.input!r})",
+        ])
+
+
+def random_pinyin(rng, max_syllables=8):
+    """Pinyin written every which way: tone numbers, tone marks or no
+    tones, v / ü / u: for ü, apostrophes, capitals, and some latin words
+    and punctuation mixed in."""
+    syllables = sorted(s for s in pin.all_pinyin if "ü" not in s and "v" not in s)
+    parts = []
+    for _ in range(rng.randint(1, max_syllables)):
+        if rng.random() < 0.1:
+            parts.append(rng.choice(LATIN_WORDS))
+        else:
+            syllable = rng.choice(syllables)
+            tone = rng.choice("123455")
+            style = rng.choice(["number", "mark", "none"])
+            if style == "number":
+                written = syllable + tone
+            elif style == "mark":
+                written = pin.number_to_diacritic(syllable + tone)
+            else:
+                written = syllable
+            written = written.replace("u:", rng.choice(["u:", "v", "ü"]))
+            if rng.random() < 0.2:
+                written = written.capitalize()
+            parts.append(written)
+        parts.append(rng.choice(["", "", " ", "'", "’", "-", ", ", ". "]))
+    return "".join(parts)
+
+
+def random_text(rng, words, max_parts=30):
+    """Mostly chinese text made of `words`, with some characters that
+    may not be words, latin words, digits and punctuation mixed in"""
+    parts = []
+    for _ in range(rng.randint(1, max_parts)):
+        roll = rng.random()
+        if roll < 0.6:
+            parts.append(rng.choice(words))
+        elif roll < 0.7:
+            parts.append(chr(rng.randint(0x4e00, 0x9fff)))
+        elif roll < 0.8:
+            parts.append(rng.choice(LATIN_WORDS))
+        else:
+            parts.append(rng.choice(PUNCTUATION))
+    return "".join(parts)
+
+
+class _TimedOut(BaseException):
+    pass
+
+
+@contextlib.contextmanager
+def _time_limit(seconds):
+    """Interrupt the block after `seconds`, where signals allow it (on
+    unix, in the main thread). Elsewhere there's no limit."""
+    if (seconds is None or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise _TimedOut()
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def outcome(function, value, timeout=None):
+    """The result of `function(value)`, or the type of exception it
+    raised, so a candidate that raises where the reference does
+    counts as matching. Calls that run longer than `timeout` seconds
+    are stopped and count as timing out."""
+    try:
+        with _time_limit(timeout):
+            return ("returned", function(value))
+    except _TimedOut:
+        return ("timed out", None)
+    except Exception as error:
+        return ("raised", type(error).__name__)
+
+
+def minimize(value, diverges):
+    """Shrink a string for which `diverges(value)` is True
+
+    Removes ever smaller chunks of the string (delta debugging) while
+    it still diverges.
+    """
+    chunks = 2
+    while value:
+        size = math.ceil(len(value) / chunks)
+        for start in range(0, len(value), size):
+            smaller = value[:start] + value[start + size:]
+            if diverges(smaller):
+                value = smaller
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if size == 1:
+                break
+            chunks = min(chunks * 2, len(value))
+    return value
+
+
+def compare(reference, candidate, generate, runs=1000, seed=0, max_divergences=10,
+            timeout=1.0):
+    """Run `reference` and `candidate` on `runs` inputs from
+    `generate(rng)`, returning a list of Divergences
+
+    timeout - seconds before a single call counts as hanging
+    """
+    rng = random.Random(seed)
+
+    def diverges(value):
+        return outcome(reference, value, timeout) != outcome(candidate, value, timeout)
+
+    divergences = []
+    seen = set()
+    for _ in range(runs):
+        value = generate(rng)
+        if not diverges(value):
+            continue
+        minimized = minimize(value, diverges)
+        if minimized in seen:
+            continue
+        seen.add(minimized)
+        divergences.append(Divergence(
+            value, minimized,
+            outcome(reference, minimized, timeout),
+            outcome(candidate, minimized, timeout),
+        ))
+        if len(divergences) >= max_divergences:
+            break
+    return divergences
+
+
+def targets(cedict, kb=None):
+    """name -> (generate, reference, adapt), where `adapt` turns an
+    implementation with the target's signature into a function of one
+    generated input"""
+    kb = kb or cepy.KnowledgeBase("", "")
+    words = sorted(e.simplified for e in cedict.entries())
+
+    def segmenter(text):
+        return ws.greedy(text, cedict.is_word)
+
+    def adapt_segmenter(function):
+        return lambda text: function(text, cedict.is_word)
+
+    def adapt_plan(plan_class):
+        def plan(text):
+            planner = plan_class(cepy.Text(text), kb, cedict, segmenter)
+            return [entry.serialize() for entry in planner.plan()]
+        return plan
+
+    return {
+        "normalize_pinyin": (random_pinyin, pin.normalize_pinyin, lambda f: f),
+        "segment_pinyin": (random_pinyin, pin.segment_pinyin, lambda f: f),
+        "greedy": (lambda rng: random_text(rng, words), ws.greedy, adapt_segmenter),
+        "plan": (
+            lambda rng: random_text(rng, words, max_parts=15),
+            cepy.StudyPlan,
+            adapt_plan,
+        ),
+    }
+
+
+def check(name, candidate, cedict, kb=None, runs=1000, seed=0):
+    """Compare `candidate` with the current implementation of target
+    `name`, returning a list of Divergences"""
+    generate, reference, adapt = targets(cedict, kb)[name]
+    return compare(adapt(reference), adapt(candidate), generate, runs, seed)
+
+
+def _greedy_tokens(text, is_word):
+    words, non_words = ws.greedy(text, is_word, output="tokens")
+    return list(words), non_words
+
+
+def _appended_plan(text, kb, cedict, segmenter):
+    """A StudyPlan of `text`, appended a few characters at a time"""
+    full = text.text
+    appended = cepy.Text(full[:3])
+    appended.segmentation_window = 8
+    planner = cepy.StudyPlan(appended, kb, cedict, segmenter)
+    for start in range(3, len(full), 3):
+        appended.append(full[start:start + 3])
+    return planner
+
+
+def _token_plan(text, kb, cedict, segmenter):
+    return cepy.StudyPlan(
+        text, kb, cedict, lambda t: ws.greedy(t, cedict.is_word, output="tokens")
+    )
+
+
+# Fast paths already in cepy-tools, checked when no candidate is given
+FAST_PATHS = {
+    "greedy": [_greedy_tokens],
+    "plan": [_token_plan, _appended_plan],
+}
+
+
+def _load(path):
+    module_name, _sep, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+# The names of the targets returned by `targets`
+TARGETS = ("normalize_pinyin", "segment_pinyin", "greedy", "plan")
+
+USAGE = """\
+usage: python -m cepy_tools.differential [TARGET MODULE:FUNCTION] [--runs N] [--seed N]
+
+TARGET is one of: {targets}"""
+
+
+def _usage_error(message):
+    print(f"error: {message}", file=sys.stderr)
+    print(USAGE.format(targets=", ".join(TARGETS)), file=sys.stderr)
+    return 2
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    runs, seed = 1000, 0
+    for flag in ("--runs", "--seed"):
+        if flag in args:
+            index = args.index(flag)
+            try:
+                value = int(args[index + 1])
+            except (IndexError, ValueError):
+                return _usage_error(f"{flag} needs a whole number")
+            del args[index:index + 2]
+            runs, seed = (value, seed) if flag == "--runs" else (runs, value)
+
+    if args:
+        if len(args) != 2:
+            return _usage_error("give both a target and a candidate, or neither")
+        name, path = args
+        if name not in TARGETS:
+            return _usage_error(f"unknown target {name!r}")
+        candidates = {name: [_load(path)]}
+    else:
+        candidates = FAST_PATHS
+
+    cedict = cepy.CeDict()
+    failed = False
+    for name, functions in candidates.items():
+        for function in functions:
+            divergences = check(name, function, cedict, runs=runs, seed=seed)
+            failed = failed or bool(divergences)
+            print("{status} {name}: {function} ({n} divergences)".format(
+                status="FAIL" if divergences else "ok  ",
+                name=name,
+                function=function.__qualname__,
+                n=len(divergences),
+            ))
+            for divergence in divergences:
+                print(divergence)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
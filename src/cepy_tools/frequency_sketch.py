@@ -0,0 +1,113 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import math
+
+class SpaceSaving:
+    """Approximate counts of the most frequent items in a stream
+
+    Uses the Space-Saving algorithm: at most `capacity` items are
+    tracked, so memory stays fixed however long the stream is. When a
+    new item arrives and the sketch is full, the least frequent item is
+    replaced and the newcomer inherits its count as possible error.
+
+    Guarantees, with N the total count added:
+      - Each estimated count is at most `error(item)` too high, and
+        never too low.
+      - Every error is at most N / capacity.
+      - Any item with a true count above N / capacity is tracked.
+    """
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1, not {capacity}")
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        # One (count, item) entry per tracked item. Counts here may be
+        # stale (too low), which `_pop_min` fixes up lazily, so
+        # incrementing a tracked item is just a dict update.
+        self._heap = []
+
+    @classmethod
+    def with_error(cls, max_error):
+        """A sketch whose counts are within `max_error` (a fraction of
+        the total, e.g. 0.001) of the true counts."""
+        return cls(math.ceil(1 / max_error))
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, item):
+        return item in self._counts
+
+    def add(self, item, count=1):
+        self.total += count
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self._errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+        else:
+            min_count, min_item = self._pop_min()
+            del counts[min_item]
+            del self._errors[min_item]
+            counts[item] = min_count + count
+            self._errors[item] = min_count
+            heapq.heappush(self._heap, (min_count + count, item))
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def _pop_min(self):
+        heap, counts = self._heap, self._counts
+        while True:
+            count, item = heapq.heappop(heap)
+            if counts[item] == count:
+                return count, item
+            heapq.heappush(heap, (counts[item], item))
+
+    def count(self, item):
+        """Estimated count of `item`, 0 if it isn't tracked"""
+        return self._counts.get(item, 0)
+
+    def error(self, item):
+        """How much the estimated count of `item` may be too high"""
+        return self._errors.get(item, 0)
+
+    @property
+    def max_error(self):
+        """Upper bound on every error, and on the count of any item
+        that isn't tracked"""
+        return self.total / self.capacity
+
+    def counts(self):
+        return dict(self._counts)
+
+    def errors(self):
+        return dict(self._errors)
+
+    def most_common(self, n=None):
+        """List of (item, estimated count, error), most frequent first"""
+        ranked = sorted(self._counts.items(), key=lambda x: x[1], reverse=True)
+        if n is not None:
+            ranked = ranked[:n]
+        return [(item, count, self._errors[item]) for item, count in ranked]
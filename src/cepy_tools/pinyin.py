@@ -15,44 +15,61 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import csv
-import pathlib
-
-PINYIN_TABLE_CSV = pathlib.Path(__file__).parent.parent.parent / "data" / "pinyin-table.csv"
-PINYIN_EXCEPTIONS_TXT = pathlib.Path(__file__).parent.parent.parent / "data" / "pinyin-exceptions.txt"
-
-
-# TODO: This shouldn't happen on import. Write a script to generate
-# this output.
-pinyin_table = []
-with open(PINYIN_TABLE_CSV) as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        final = row["FINAL"]
-        for initial, pinyin in row.items():
-            if initial == "FINAL" or pinyin == "":
-                continue
-            pinyin_table.append({
-                "initial": initial,
-                "final": final,
-                "pinyin": pinyin.strip("*"),
-                "cedict_pinyin": pinyin.strip("*").replace("ü", "u:"),
-                "v_pinyin": pinyin.strip("*").replace("ü", "v"),
-                "is_alt": pinyin.endswith("*"),
-            })
-
-pinyin_exceptions = []
-with open(PINYIN_EXCEPTIONS_TXT) as txt:
-    for line in txt.readlines():
-        pinyin_exceptions.append(line.strip())
-
-all_pinyin = (
-    set(p["pinyin"] for p in pinyin_table)
-    | set(p["cedict_pinyin"] for p in pinyin_table)
-    | set(p["v_pinyin"] for p in pinyin_table)
-    | set(pinyin_exceptions)
-)
-pinyin_characters = "aeiouüāēīōūǖáéíóúǘǎěǐǒǔǚàèìòùǜbcdfghjklmnpqrstvwxz:AEIOUBCDFGHJKLMNPQRSTWXZ"
+import functools
+import os
+import unicodedata
+
+# os.path rather than pathlib, which roughly doubles the import time
+# of this module.
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+PINYIN_TABLE_CSV = os.path.join(DATA_DIR, "pinyin-table.csv")
+PINYIN_EXCEPTIONS_TXT = os.path.join(DATA_DIR, "pinyin-exceptions.txt")
+
+
+# The pinyin tables are read from the data files on first use rather
+# than on import, so importing this module stays cheap.
+# TODO: Write a script to generate this output.
+@functools.cache
+def _load_pinyin_table():
+    import csv
+
+    pinyin_table = []
+    with open(PINYIN_TABLE_CSV) as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            final = row["FINAL"]
+            for initial, pinyin in row.items():
+                if initial == "FINAL" or pinyin == "":
+                    continue
+                pinyin_table.append({
+                    "initial": initial,
+                    "final": final,
+                    "pinyin": pinyin.strip("*"),
+                    "cedict_pinyin": pinyin.strip("*").replace("ü", "u:"),
+                    "v_pinyin": pinyin.strip("*").replace("ü", "v"),
+                    "is_alt": pinyin.endswith("*"),
+                })
+    return pinyin_table
+
+@functools.cache
+def _load_pinyin_exceptions():
+    pinyin_exceptions = []
+    with open(PINYIN_EXCEPTIONS_TXT) as txt:
+        for line in txt.readlines():
+            pinyin_exceptions.append(line.strip())
+    return pinyin_exceptions
+
+@functools.cache
+def _load_all_pinyin():
+    pinyin_table = _load_pinyin_table()
+    return frozenset(
+        set(p["pinyin"] for p in pinyin_table)
+        | set(p["cedict_pinyin"] for p in pinyin_table)
+        | set(p["v_pinyin"] for p in pinyin_table)
+        | set(_load_pinyin_exceptions())
+    )
+
+pinyin_characters = "aeiouüāēīōūǖáéíóúǘǎěǐǒǔǚàèìòùǜbcdfghjklmnpqrstvwxyz:AEIOUBCDFGHJKLMNPQRSTWXYZ"
 pinyin_diacritics = "āēīōūǖáéíóúǘǎěǐǒǔǚàèìòùǜ"
 diacritic_removal_table = str.maketrans(dict(zip(
     list("āēīōūǖáéíóúǘǎěǐǒǔǚàèìòùǜ"), list("aeiouü")*4
@@ -66,6 +83,54 @@ umlaut_removal_table = str.maketrans({"ü": "u:", "v": "u:"})
 - In all other cases, the final vowel takes the mark
 """
 
+tone_combining_marks = {
+    "1": "\u0304", "2": "\u0301", "3": "\u030c", "4": "\u0300", "5": "",
+}
+
+def _mark_tone(syllable, tone):
+    """Place the tone mark on a (ü spelled) syllable following the rules above
+    """
+    if "a" in syllable:
+        mark_at = syllable.index("a")
+    elif "e" in syllable:
+        mark_at = syllable.index("e")
+    elif "ou" in syllable:
+        mark_at = syllable.index("o")
+    else:
+        vowels = [i for i, c in enumerate(syllable) if c in "aeiouü"]
+        # Syllabic nasals (m, n, ng, hm, hng) take the mark on the nasal
+        mark_at = vowels[-1] if vowels else syllable.index(syllable.lstrip("h")[0])
+    marked = syllable[:mark_at + 1] + tone_combining_marks[tone] + syllable[mark_at + 1:]
+    return unicodedata.normalize("NFC", marked)
+
+# Every numbered syllable (as written by cc-cedict, e.g. "nu:e4") and
+# its tone marked equivalent (e.g. "nüè")
+@functools.cache
+def _load_diacritic_pinyin_table():
+    diacritic_pinyin_table = {}
+    for syllable in _load_all_pinyin():
+        if "v" in syllable or ("u:" not in syllable and "ü" in syllable):
+            continue
+        for tone in "12345":
+            diacritic_pinyin_table[syllable + tone] = _mark_tone(
+                syllable.replace("u:", "ü"), tone
+            )
+    return diacritic_pinyin_table
+
+_lazy_tables = {
+    "pinyin_table": _load_pinyin_table,
+    "pinyin_exceptions": _load_pinyin_exceptions,
+    "all_pinyin": _load_all_pinyin,
+    "diacritic_pinyin_table": _load_diacritic_pinyin_table,
+}
+
+def __getattr__(name):
+    loader = _lazy_tables.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return loader()
+
+
 def normalize_pinyin(pinyin):
     """Standardize pinyin strings to make comparison easier.
 
@@ -171,6 +236,45 @@ def tone_diacritic_to_number_string(text):
     return "5"
 
 
+def number_to_diacritic(pinyin):
+    """Convert cc-cedict numbered pinyin to tone marked pinyin
+
+    "cheng2 xu4 she4 ji4" -> "chéng xù shè jì"
+    "nu:3 ren2" -> "nǚ rén"
+
+    Capitalized syllables stay capitalized. Anything that isn't a
+    numbered syllable (e.g. "[T F]" or "·") is left alone.
+    """
+    table = _load_diacritic_pinyin_table()
+    return " ".join(_syllable_to_diacritic(s, table) for s in pinyin.split(" "))
+
+
+def number_to_diacritic_many(pinyins):
+    """Convert many numbered pinyin strings at once
+
+    Each distinct string is only converted once, which makes rendering
+    thousands of entries cheap.
+    """
+    converted = {}
+    output = []
+    for pinyin in pinyins:
+        unicode_pinyin = converted.get(pinyin)
+        if unicode_pinyin is None:
+            unicode_pinyin = converted[pinyin] = number_to_diacritic(pinyin)
+        output.append(unicode_pinyin)
+    return output
+
+
+def _syllable_to_diacritic(syllable, table):
+    marked = table.get(syllable)
+    if marked is not None:
+        return marked
+    marked = table.get(syllable.lower())
+    if marked is not None:
+        return marked[0].upper() + marked[1:]
+    return syllable
+
+
 def segment_pinyin(pinyin):
     """Convert string into a list of pinyin and non-pinyin components"""
     remaining_text = pinyin
@@ -189,6 +293,8 @@ def pop_pinyin(text):
     #  - Followed by space?
     #  - Is pinyin
 
+    all_pinyin = _load_all_pinyin()
+
     # (0) Munch any whitespace or unused punctuation from the start
     munch_characters = " \n\t-・·.,，_'’`‘’“”\"«»‹›„“‚’「」『』《》〈〉"
     text = text.lstrip(munch_characters)
@@ -226,10 +332,11 @@ def pop_pinyin(text):
                 return (curr_slice, curr_rest)
         i += 1
 
-    # (2) If there's not valid pinyin at the start: reset to 0 and
-    # grab anything that's not valid pinyin, up ot the first valid
-    # pinyin and bracket it.
-    i = 0
+    # (2) If there's not valid pinyin at the start: grab anything
+    # that's not valid pinyin, up ot the first valid pinyin and bracket
+    # it. Always take at least one character, so callers popping in a
+    # loop make progress.
+    i = 1
     while i < len(text):
         # Search window for valid pinyin
         longest_pinyin = len("zhuang1")
@@ -0,0 +1,338 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import collections
+import functools
+import heapq
+import math
+import os
+
+import cepy_tools.pinyin as pin
+
+"""
+Pinyin to hanzi conversion, like an input method.
+
+The input (toned or toneless, e.g. "woxihuanchengxusheji" or
+"wo3 xi3huan1") is turned into a lattice: every way of splitting it
+into syllables, and every dictionary word whose syllables span a run
+of them. The cheapest paths through the lattice are the candidates.
+
+A word costs the negative log of how often it's used, from the word
+counts in data/word-frequency.txt, plus WORD_COST so fewer, longer
+words win close calls. The counts don't tell readings apart, so they
+go to the reading used most in other counted headwords, and other
+readings cost more by how much less they're used there. Entries that
+only point at another word ("variant of ...", "used in ...") aren't
+counted.
+Words that aren't counted there cost more than any word that is.
+Between those, a word that's part of more headwords
+(中国 is part of far more headwords than 国菜 is) is taken to be more
+common.
+
+Only the `k` cheapest words for each run of syllables can be on the
+`k` best paths, so the lattice keeps no more than that many per run.
+"""
+
+WORD_FREQUENCY_TXT = os.path.join(pin.DATA_DIR, "word-frequency.txt")
+
+WORD_COST = 1.0
+# How much more an uncounted word costs than the rarest counted word
+UNCOUNTED_COST = 1.0
+SURNAME_COST = 1.0
+UNKNOWN_COST = 30.0
+SEPARATORS = " '’-"
+LONGEST_SYLLABLE = len("zhuang")
+# Longest word whose appearances in other headwords are counted
+COUNTED_LENGTH = 4
+
+
+def _is_cross_reference(entry):
+    """Whether the entry only points at another word, like "variant of
+    ..." or "used in 假掰[gei1 bai1]"
+    """
+    return entry.is_variant or all(d.startswith("used in ") for d in entry.defs)
+
+
+@functools.cache
+def _load_word_frequency():
+    counts = {}
+    with open(WORD_FREQUENCY_TXT, encoding="utf-8") as txt:
+        for line in txt:
+            if line.startswith("#") or not line.strip():
+                continue
+            word, count = line.split()
+            counts[word] = int(count)
+    return counts
+
+
+class PinyinConverter:
+    def __init__(self, cedict, script="simplified", word_cost=None):
+        """
+        cedict - the dictionary to convert with
+        script - "simplified" or "traditional" output
+        word_cost - optional function (hanzi, entry) -> cost, replacing
+                    the built in estimate. Lower is better.
+        """
+        self.cedict = cedict
+        self.script = script
+        self.word_cost = word_cost
+        # Built on first use, and again whenever the dictionary's
+        # version changes (e.g. a LiveCeDict picking up a new release)
+        self._index = None
+        self._index_version = None
+
+    def _current_index(self):
+        version = self.cedict.version
+        if self._index is None or version != self._index_version:
+            self._build_index()
+            self._index_version = version
+        return self._index
+
+    def _build_index(self):
+        all_pinyin = pin.all_pinyin
+        word_cost = self.word_cost or self._estimated_cost()
+
+        # (syllable, ...) -> [(cost, hanzi, tones)], cheapest first,
+        # where the syllables are toneless and tones has one tone
+        # number per syllable.
+        words = collections.defaultdict(list)
+        for entry in self.cedict.entries():
+            syllables = entry.pinyin.lower().split(" ")
+            bases = tuple(s.rstrip("12345") for s in syllables)
+            if not all(b in all_pinyin for b in bases):
+                continue
+            tones = tuple(s[-1] if s[-1] in "12345" else "5" for s in syllables)
+            hanzi = getattr(entry, self.script)
+            if len(hanzi) != len(bases):
+                continue
+            words[bases].append((word_cost(hanzi, entry), hanzi, tones))
+        for options in words.values():
+            options.sort()
+
+        prefixes = set()
+        for bases in words:
+            for end in range(1, len(bases) + 1):
+                prefixes.add(bases[:end])
+        self._index = (dict(words), prefixes, max(map(len, words), default=0))
+        return self._index
+
+    def _estimated_cost(self):
+        """The built in word_cost, see the module docstring"""
+        counts = _load_word_frequency()
+        total = sum(counts.values())
+        least = min(counts.values(), default=1)
+        rarest = math.log10(total / least)
+        uncounted = rarest + UNCOUNTED_COST
+
+        # How many headwords each short run of characters appears in
+        headword_counts = collections.Counter()
+        for entry in self.cedict.entries():
+            for headword in {entry.simplified, entry.traditional}:
+                headword_counts.update({
+                    headword[i:j]
+                    for i in range(len(headword))
+                    for j in range(i + 1, min(len(headword), i + COUNTED_LENGTH) + 1)
+                })
+        # Keeps uncounted words within UNCOUNTED_COST of each other
+        most_headwords = math.log10(1 + max(headword_counts.values(), default=0)) or 1
+
+        # The word counts don't say which reading was counted. A reading
+        # is taken to be as common as the counted headwords it's part of
+        # (了 is le5 in 为了 but liao3 in 了解), and the most common one
+        # gets the count.
+        part_counts = collections.Counter()
+        cross_references = set()
+        for entry in self.cedict.entries():
+            if _is_cross_reference(entry):
+                cross_references.add(entry)
+            count = counts.get(entry.simplified)
+            syllables = entry.pinyin.lower().split(" ")
+            if count is None or len(syllables) != len(entry.simplified):
+                continue
+            headword = entry.simplified
+            for i in range(len(headword)):
+                for j in range(i + 1, min(len(headword), i + COUNTED_LENGTH) + 1):
+                    if j - i < len(headword):
+                        part = (headword[i:j], " ".join(syllables[i:j]))
+                        part_counts[part] += count
+        reading_counts = collections.defaultdict(dict)
+        for entry in self.cedict.entries():
+            if entry not in cross_references:
+                reading = entry.pinyin.lower()
+                reading_counts[entry.simplified][reading] = (
+                    part_counts[entry.simplified, reading]
+                )
+
+        def word_cost(hanzi, entry):
+            count = counts.get(entry.simplified)
+            if entry in cross_references:
+                count = None
+            if count is not None:
+                cost = math.log10(total / count)
+                # Other readings cost more by how much less they're used,
+                # but no more than the rarest counted word
+                readings = reading_counts[entry.simplified]
+                main = max(readings.values())
+                cost = min(rarest, cost + math.log10(
+                    (least + main) / (least + readings[entry.pinyin.lower()])
+                ))
+            else:
+                cost = uncounted - UNCOUNTED_COST * (
+                    math.log10(1 + headword_counts[hanzi]) / most_headwords
+                )
+            if entry.pinyin[:1].isupper():
+                cost += SURNAME_COST
+            return WORD_COST + cost
+
+        return word_cost
+
+    def _syllables(self, text):
+        """Every syllable in `text`, as {start: [(end, base, tone)]}
+
+        `end` skips any separators after the syllable. `tone` is None
+        when the input gives no tone.
+        """
+        all_pinyin = pin.all_pinyin
+        syllables = collections.defaultdict(list)
+        for start in range(len(text)):
+            if text[start] in SEPARATORS:
+                continue
+            for end in range(start + 1, min(len(text), start + LONGEST_SYLLABLE + 1) + 1):
+                written = text[start:end]
+                base = written.translate(pin.diacritic_removal_table)
+                base = base.replace("ü", "u:").replace("v", "u:")
+                if base not in all_pinyin:
+                    continue
+                tone = pin.tone_diacritic_to_number_string(written)
+                tone = None if tone == "5" else tone
+                stop = end
+                if tone is None and stop < len(text) and text[stop] in "12345":
+                    tone = text[stop]
+                    stop += 1
+                while stop < len(text) and text[stop] in SEPARATORS:
+                    stop += 1
+                syllables[start].append((stop, base, tone))
+        return syllables
+
+    def _lattice(self, text, k):
+        """Word edges {start: [(end, cost, hanzi)]} spanning the input,
+        keeping the `k` cheapest words for each span"""
+        words, prefixes, longest = self._current_index()
+        syllables = self._syllables(text)
+        edges = {}
+
+        for start in range(len(text)):
+            best = {}
+            # Walk runs of syllables from `start` while they're still
+            # the beginning of some dictionary word.
+            stack = [(start, (), ())]
+            while stack:
+                pos, bases, tones = stack.pop()
+                for end, base, tone in syllables.get(pos, ()):
+                    next_bases = bases + (base,)
+                    if next_bases not in prefixes:
+                        continue
+                    next_tones = tones + (tone,)
+                    span = best.setdefault(end, {})
+                    toned = any(next_tones)
+                    for cost, hanzi, entry_tones in words.get(next_bases, ()):
+                        if len(span) >= k:
+                            # Options are cheapest first, so the rest
+                            # can't make the k best for this span
+                            if cost >= max(span.values()):
+                                break
+                        if hanzi in span and span[hanzi] <= cost:
+                            continue
+                        if toned and not _tones_match(next_tones, entry_tones):
+                            continue
+                        span[hanzi] = cost
+                        if len(span) > k:
+                            del span[max(span, key=span.get)]
+                    if len(next_bases) < longest:
+                        stack.append((end, next_bases, next_tones))
+
+            edges[start] = [
+                (end, cost, hanzi)
+                for end, span in best.items()
+                for hanzi, cost in span.items()
+            ]
+            if text[start] not in SEPARATORS:
+                # Pass through anything that can't be converted
+                edges[start].append((start + 1, UNKNOWN_COST, text[start]))
+            else:
+                edges[start].append((start + 1, 0.0, ""))
+        return edges
+
+    def candidates(self, pinyin, k=5):
+        """The `k` best conversions of `pinyin`, each a list of words"""
+        text = pinyin.strip().lower()
+        if not text:
+            return [[]]
+        edges = self._lattice(text, k)
+
+        # best[pos] is a heap of up to k (cost, words) paths ending at
+        # pos, worst first
+        best = [[] for _ in range(len(text) + 1)]
+        best[0] = [_Reversed((0.0, ()))]
+        for start in range(len(text)):
+            paths_here = sorted(p.value for p in best[start])
+            if not paths_here:
+                continue
+            for end, cost, hanzi in edges[start]:
+                paths = best[end]
+                for path_cost, path in paths_here:
+                    if len(paths) == k and path_cost + cost > paths[0].value[0]:
+                        # Paths here are cheapest first, none of the
+                        # rest can beat the worst path kept at `end`
+                        break
+                    candidate = (path_cost + cost, path + (hanzi,) if hanzi else path)
+                    if len(paths) < k:
+                        heapq.heappush(paths, _Reversed(candidate))
+                    elif candidate < paths[0].value:
+                        heapq.heapreplace(paths, _Reversed(candidate))
+
+        finished = sorted(p.value for p in best[len(text)])
+        return [list(words) for _cost, words in finished]
+
+    def convert(self, pinyin, k=5):
+        """The `k` best conversions of `pinyin` as strings"""
+        converted = []
+        for words in self.candidates(pinyin, k):
+            text = "".join(words)
+            if text not in converted:
+                converted.append(text)
+        return converted
+
+
+class _Reversed:
+    """Heap item ordered backwards, so heapq keeps a max-heap"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _tones_match(given, entry_tones):
+    """Given tones (None for untoned) match dictionary tones, where a
+    neutral tone in the dictionary matches anything"""
+    return all(
+        g is None or e == "5" or g == e
+        for g, e in zip(given, entry_tones)
+    )
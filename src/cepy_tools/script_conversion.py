@@ -0,0 +1,116 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import collections
+
+"""
+Simplified <-> traditional conversion.
+
+Conversion tables are built from the headword pairs of a CeDict. Text
+is converted phrase by phrase, always taking the longest dictionary
+headword at each position, which resolves most one-to-many character
+mappings (e.g. 发 -> 發 or 髮). Anything not covered by a phrase falls
+back to the most common single character mapping seen across the
+dictionary. Entries that are only a variant of another entry are used
+only where no other entry covers the phrase or character.
+"""
+
+class ScriptConverter:
+    def __init__(self, cedict):
+        self.cedict = cedict
+        # Tables by target script, for the dictionary version they
+        # were built from
+        self._tables = {}
+        self._tables_version = None
+
+    def to_traditional(self, text):
+        return self._convert(text, "traditional")
+
+    def to_simplified(self, text):
+        return self._convert(text, "simplified")
+
+    def _table(self, target):
+        """Build (or fetch) the conversion tables for one direction"""
+        version = self.cedict.version
+        if version != self._tables_version:
+            self._tables = {}
+            self._tables_version = version
+        table = self._tables.get(target)
+        if table is not None:
+            return table
+
+        source = "simplified" if target == "traditional" else "traditional"
+        # Entries that are only "variant of ..." another entry give the
+        # less usual way of writing it (e.g. 這裏 for 這裡), so they only
+        # count where nothing else does
+        phrases = {}
+        variant_phrases = {}
+        char_counts = collections.defaultdict(collections.Counter)
+        variant_char_counts = collections.defaultdict(collections.Counter)
+        for entry in self.cedict.entries():
+            src, dst = getattr(entry, source), getattr(entry, target)
+            if len(src) != len(dst):
+                continue
+            if entry.is_variant:
+                entry_phrases, entry_counts = variant_phrases, variant_char_counts
+            else:
+                entry_phrases, entry_counts = phrases, char_counts
+            if len(src) > 1:
+                entry_phrases.setdefault(src, dst)
+            for s, d in zip(src, dst):
+                entry_counts[s][d] += 1
+
+        for src, dst in variant_phrases.items():
+            phrases.setdefault(src, dst)
+        for s, counts in variant_char_counts.items():
+            char_counts.setdefault(s, counts)
+        chars = {
+            s: counts.most_common(1)[0][0]
+            for s, counts in char_counts.items()
+        }
+        prefixes = set()
+        for phrase in phrases:
+            for end in range(2, len(phrase) + 1):
+                prefixes.add(phrase[:end])
+        max_len = max((len(p) for p in phrases), default=0)
+
+        table = (phrases, prefixes, chars, max_len)
+        self._tables[target] = table
+        return table
+
+    def _convert(self, text, target):
+        phrases, prefixes, chars, max_len = self._table(target)
+        output = []
+        pos = 0
+        while pos < len(text):
+            # Scan forward while we're still inside some phrase,
+            # remembering the longest complete phrase seen.
+            match_end = None
+            end = pos + 2
+            limit = min(len(text), pos + max_len)
+            while end <= limit and text[pos:end] in prefixes:
+                if text[pos:end] in phrases:
+                    match_end = end
+                end += 1
+
+            if match_end is not None:
+                output.append(phrases[text[pos:match_end]])
+                pos = match_end
+            else:
+                output.append(chars.get(text[pos], text[pos]))
+                pos += 1
+        return "".join(output)
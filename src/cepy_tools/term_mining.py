@@ -0,0 +1,280 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import array
+import collections
+import itertools
+import math
+
+import cepy_tools.cepy as cepy
+import cepy_tools.word_segmentation as ws
+
+"""
+Mining a corpus for words the dictionary doesn't have.
+
+Names and neologisms missing from the dictionary get segmented into
+single characters, and only show up as noise. Here they're found as
+substrings of the CJK runs of a text that:
+  - repeat at least `min_count` times
+  - aren't dictionary words
+  - have high boundary entropy: the characters just before and just
+    after them vary, so they stand on their own rather than being
+    part of something longer ("巨蟒程" is always followed by "序")
+  - are cohesive: they appear far more often than their parts would
+    land next to each other by chance, so "我不" (two common words)
+    isn't taken for a term
+
+Repeats are found with a suffix array sorted on the first
+`max_length` characters of each suffix, so sorting it is
+O(n log n * max_length) and finding the repeats is O(n * max_length).
+The suffix array is built and scanned a batch of suffixes at a time.
+Every suffix starting with the same two characters is in the same
+batch, so each repeat is counted in full in one batch, and memory
+beyond the text itself is in proportion to the batch size rather than
+the text.
+"""
+
+SEPARATOR = "\0"
+# Most suffixes sorted at once, see `suffix_batches`
+BATCH_SIZE = 1 << 17
+
+
+class MinedTerm:
+    def __init__(self, text, count, left_entropy, right_entropy):
+        self.text = text
+        self.count = count
+        self.left_entropy = left_entropy
+        self.right_entropy = right_entropy
+
+    @property
+    def score(self):
+        """Frequency weighted by the weaker boundary"""
+        return self.count * min(self.left_entropy, self.right_entropy)
+
+    def __repr__(self):
+        return "<MinedTerm {t} - {c} times, entropy {l:.2f} / {r:.2f}>".format(
+            t=self.text, c=self.count, l=self.left_entropy, r=self.right_entropy,
+        )
+
+
+def cjk_runs(text):
+    """The CJK runs of `text`, joined by SEPARATOR"""
+    return SEPARATOR.join(ws.CJK_RUN_PATTERN.findall(text))
+
+
+def suffix_array(text, max_length, starts=None):
+    """Start offsets of the suffixes of `text` (or just the suffixes
+    starting at `starts`), sorted by their first `max_length`
+    characters (ties in start order)"""
+    if starts is None:
+        starts = range(len(text))
+    return array.array("I", sorted(starts, key=lambda i: text[i:i + max_length]))
+
+
+def suffix_batches(runs, max_length, batch_size=BATCH_SIZE):
+    """The suffix array of `runs` (see `cjk_runs`), a batch at a time
+
+    Yields sorted suffix arrays, each of the suffixes starting with some
+    set of characters. A character starting more than `batch_size`
+    suffixes has them split into batches by their second character.
+    Suffixes starting with SEPARATOR are left out.
+    """
+    # Suffix starts by first character, in one pass over the text
+    buckets = _buckets(range(len(runs)), lambda i: runs[i])
+    buckets.pop(SEPARATOR, None)
+    counts = {char: len(starts) for char, starts in buckets.items()}
+    last = len(runs) - 1
+    for chars in _batch_keys(counts, batch_size):
+        if len(chars) == 1 and counts[chars[0]] > batch_size:
+            # A suffix that's a single character has SEPARATOR second
+            seconds = _buckets(
+                buckets.pop(chars[0]),
+                lambda i: runs[i + 1] if i < last else SEPARATOR,
+            )
+            second_counts = {char: len(starts) for char, starts in seconds.items()}
+            for batch in _batch_keys(second_counts, batch_size):
+                yield suffix_array(runs, max_length, itertools.chain.from_iterable(
+                    seconds.pop(c) for c in batch
+                ))
+        else:
+            yield suffix_array(runs, max_length, itertools.chain.from_iterable(
+                buckets.pop(c) for c in chars
+            ))
+
+
+def _buckets(starts, key):
+    """`starts` grouped by `key`, each group kept in order"""
+    buckets = collections.defaultdict(lambda: array.array("I"))
+    for i in starts:
+        buckets[key(i)].append(i)
+    return buckets
+
+
+def _batch_keys(counts, batch_size):
+    """Split the keys of `counts` into lists whose counts add up to no
+    more than `batch_size`, except for keys over it on their own"""
+    batch, size = [], 0
+    for key in sorted(counts):
+        if batch and size + counts[key] > batch_size:
+            yield batch
+            batch, size = [], 0
+        batch.append(key)
+        size += counts[key]
+    if batch:
+        yield batch
+
+
+def _common_prefix_lengths(text, sa, max_length):
+    """lcp[j] is the length of the common prefix of suffixes sa[j - 1]
+    and sa[j], stopping at max_length or a SEPARATOR"""
+    lcp = array.array("I", bytes(4 * len(sa)))
+    for j in range(1, len(sa)):
+        a, b = sa[j - 1], sa[j]
+        length = 0
+        limit = min(max_length, len(text) - max(a, b))
+        while (length < limit and text[a + length] == text[b + length]
+               and text[a + length] != SEPARATOR):
+            length += 1
+        lcp[j] = length
+    return lcp
+
+
+def _entropy(neighbours, boundaries):
+    """Entropy of the neighbouring characters, where each text boundary
+    counts as a distinct neighbour"""
+    total = sum(neighbours.values()) + boundaries
+    counts = list(neighbours.values()) + [1] * boundaries
+    return -sum(c / total * math.log2(c / total) for c in counts)
+
+
+def mine_terms(text, is_word=None, min_count=5, min_length=2, max_length=6,
+               min_entropy=1.0, min_cohesion=50.0, batch_size=BATCH_SIZE):
+    """Frequently repeated substrings of the CJK in `text` that aren't
+    words, best first
+
+    is_word - a function mapping text -> bool, e.g. `CeDict.is_word`.
+              Matching substrings are left out.
+    min_entropy - lowest boundary entropy (in bits) on both sides
+    min_cohesion - lowest ratio of how often a term appears to how
+                   often its two parts would appear together by chance,
+                   for the split of it into two parts that's likeliest
+    batch_size - most suffixes sorted at once, see `suffix_batches`
+    """
+    if min_count < 2:
+        raise ValueError("min_count must be at least 2 for a substring to repeat")
+    if min_length < 2:
+        raise ValueError("min_length must be at least 2")
+
+    runs = cjk_runs(text)
+
+    # Counts of every repeated substring. Each part of a term repeats
+    # at least as often as the term, so once every batch is done the
+    # parts of every term are in here.
+    repeated = collections.Counter(runs)
+    del repeated[SEPARATOR]
+    total = sum(repeated.values())
+
+    candidates = []
+    for sa in suffix_batches(runs, max_length, batch_size):
+        lcp = _common_prefix_lengths(runs, sa, max_length)
+        for length in range(min_length, max_length + 1):
+            # Suffixes sharing their first `length` characters are
+            # consecutive in the suffix array.
+            lo = 0
+            for hi in range(1, len(sa) + 1):
+                if hi < len(sa) and lcp[hi] >= length:
+                    continue
+                count = hi - lo
+                if count >= min_count:
+                    term_text = runs[sa[lo]:sa[lo] + length]
+                    if length < max_length:
+                        repeated[term_text] = count
+                    # Parts in later batches aren't counted yet, but
+                    # the parts counted so far can already rule it out
+                    cohesion = _cohesion(term_text, count, repeated, total)
+                    if cohesion >= min_cohesion and not (is_word and is_word(term_text)):
+                        term = _term(runs, sa, lo, hi, length, min_entropy)
+                        if term is not None:
+                            candidates.append(term)
+                lo = hi
+
+    terms = [
+        term for term in candidates
+        if _cohesion(term.text, term.count, repeated, total) >= min_cohesion
+    ]
+    terms.sort(key=lambda t: (-t.score, -t.count, t.text))
+    return terms
+
+
+def _cohesion(text, count, repeated, total):
+    """How much more often `text` appears than its parts would land
+    together by chance, for its likeliest split into two parts that
+    are both in `repeated`"""
+    cohesion = math.inf
+    for k in range(1, len(text)):
+        left, right = repeated.get(text[:k]), repeated.get(text[k:])
+        if left and right:
+            cohesion = min(cohesion, count * total / (left * right))
+    return cohesion
+
+
+def _term(runs, sa, lo, hi, length, min_entropy):
+    start = sa[lo]
+    text = runs[start:start + length]
+    left, right = collections.Counter(), collections.Counter()
+    left_boundaries = right_boundaries = 0
+    for j in range(lo, hi):
+        start = sa[j]
+        before = runs[start - 1] if start > 0 else SEPARATOR
+        after = runs[start + length] if start + length < len(runs) else SEPARATOR
+        if before == SEPARATOR:
+            left_boundaries += 1
+        else:
+            left[before] += 1
+        if after == SEPARATOR:
+            right_boundaries += 1
+        else:
+            right[after] += 1
+
+    left_entropy = _entropy(left, left_boundaries)
+    right_entropy = _entropy(right, right_boundaries)
+    if min(left_entropy, right_entropy) < min_entropy:
+        return None
+    return MinedTerm(text, hi - lo, left_entropy, right_entropy)
+
+
+def overlay(terms, cedict=None):
+    """A CeDictOverlay adding each mined term as a word
+
+    If `cedict` is given, each term gets pinyin made from a reading of
+    each of its characters (preferring readings that aren't names),
+    where the dictionary has one.
+    """
+    lines = []
+    for term in terms:
+        pinyin = ""
+        if cedict is not None:
+            readings = [cedict.lookup(c, "any") for c in term.text]
+            if all(readings):
+                pinyin = " ".join(
+                    min(r, key=lambda e: e.pinyin[:1].isupper()).pinyin
+                    for r in readings
+                )
+        lines.append(
+            f"{term.text} {term.text} [{pinyin}] /(mined term, seen {term.count} times)/"
+        )
+    return cepy.CeDictOverlay(add=lines)
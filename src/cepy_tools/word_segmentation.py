@@ -15,7 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import array
+import bisect
 import collections
+import functools
+import re
 
 """
 Segmentation functions.
@@ -30,12 +34,89 @@ Inputs:
 Outputs:
   - A list of words. Punctuation removed
   - A dictionary of non-words and their frequency
+
+Segmenters that take `output="tokens"` return a Tokens object in place
+of the list of words. It holds each word as a vocabulary ID and start
+offset in compact arrays, so a long text doesn't leave one string
+object per word behind.
 """
 
-def greedy(text, is_word):
+class Tokens:
+    """The words of a segmented text, as vocabulary IDs and offsets
+
+    Behaves like a read-only list of the words, but each distinct word
+    is stored once, in `vocabulary`. `ids` and `starts` are
+    array("I")s with one vocabulary ID and start offset per word.
+    """
+    def __init__(self):
+        self.vocabulary = []
+        self.ids = array.array("I")
+        self.starts = array.array("I")
+        self._vocabulary_ids = {}
+
+    def add(self, word, start):
+        vocabulary_id = self._vocabulary_ids.get(word)
+        if vocabulary_id is None:
+            vocabulary_id = self._vocabulary_ids[word] = len(self.vocabulary)
+            self.vocabulary.append(word)
+        self.ids.append(vocabulary_id)
+        self.starts.append(start)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.vocabulary[i] for i in self.ids[index]]
+        return self.vocabulary[self.ids[index]]
+
+    def __iter__(self):
+        vocabulary = self.vocabulary
+        return (vocabulary[i] for i in self.ids)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Tokens, list)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def ends(self):
+        """End offset of each word"""
+        lengths = [len(w) for w in self.vocabulary]
+        return array.array("I", (
+            start + lengths[i] for start, i in zip(self.starts, self.ids)
+        ))
+
+    def frequency(self, start=0):
+        """How often each word appears, from the `start`th word on.
+        IDs are counted rather than words, so no strings are made."""
+        counts = collections.Counter(self.ids[start:])
+        return {self.vocabulary[i]: n for i, n in counts.items()}
+
+
+def _word_output(output):
+    if output == "words":
+        return []
+    if output == "tokens":
+        return Tokens()
+    raise ValueError(f"Unknown output '{output}', expected 'words' or 'tokens'")
+
+
+def greedy(text, is_word, is_prefix=None, output="words"):
     """Return the longest word whenver possible
+
+    By default the search for a longer word stops at the first
+    non-word. If `is_prefix` is given (a function mapping text -> bool,
+    True if the text is the start of some word) the search carries on
+    through non-word prefixes, so "程序设计" is still found when "程序设"
+    is not a word.
+
+    output - "words" for a list of words, or "tokens" for a Tokens
     """
-    words = []
+    if is_prefix is not None:
+        return _greedy_prefix(text, is_word, is_prefix, output)
+
+    words = _word_output(output)
+    add = words.add if output == "tokens" else None
     non_words = collections.defaultdict(int)
 
     pos = 0
@@ -50,7 +131,10 @@ def greedy(text, is_word):
             word_end = pos + word_len
 
         if word is not None:
-            words.append(word)
+            if add is None:
+                words.append(word)
+            else:
+                add(word, pos)
             word = None
             pos += word_len - 1
         else:
@@ -62,6 +146,190 @@ def greedy(text, is_word):
 
     return words, dict(non_words)
 
+def _greedy_prefix(text, is_word, is_prefix, output):
+    words = _word_output(output)
+    add = words.add if output == "tokens" else None
+    non_words = collections.defaultdict(int)
+
+    pos = 0
+    while pos < len(text):
+        word_end = None
+        end = pos + 1
+        while end <= len(text) and is_prefix(text[pos:end]):
+            if is_word(text[pos:end]):
+                word_end = end
+            end += 1
+
+        if word_end is not None:
+            if add is None:
+                words.append(text[pos:word_end])
+            else:
+                add(text[pos:word_end], pos)
+            pos = word_end
+        else:
+            non_words[text[pos]] += 1
+            pos += 1
+
+    return words, dict(non_words)
+
+# CJK ideographs, including the extension blocks and 〇
+CJK_RANGES = r"\u3007\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f"
+CJK_RUN_PATTERN = re.compile(rf"([{CJK_RANGES}]+)")
+# Runs of CJK, other letters and digits, whitespace, and anything else
+# (punctuation and symbols)
+RUN_PATTERNS = {
+    "cjk": rf"[{CJK_RANGES}]+",
+    "alnum": rf"[^\W_{CJK_RANGES}]+",
+    "space": r"\s+",
+    "punct": r"[^\w\s]+|_+",
+}
+SCRIPT_RUN_PATTERN = re.compile("|".join(
+    f"(?P<{kind}>{pattern})" for kind, pattern in RUN_PATTERNS.items()
+))
+
+def script_runs(text):
+    """Split text into runs of one kind of character, in a single pass
+
+    Returns a list of (kind, run) pairs, where kind is one of "cjk",
+    "alnum" (latin and other letters, and digits), "space" or "punct".
+    """
+    return [(m.lastgroup, m.group()) for m in SCRIPT_RUN_PATTERN.finditer(text)]
+
+def pretokenized(text, is_word, segmenter=greedy, alnum="non_word",
+                 punct="non_word", space="skip"):
+    """Segment only the CJK runs of a text, handling the rest in bulk
+
+    Mixed script text otherwise costs the segmenter an `is_word` call
+    for every latin letter, digit, space and punctuation mark. Here
+    the text is split into the runs of `script_runs`, and only CJK runs
+    are passed to `segmenter` (any function with the common interface).
+    Dictionary words mixing scripts, like "T恤", are not found.
+
+    Policies for the other kinds of run:
+      - "word": each run is a word (e.g. "Python")
+      - "non_word": each run is counted as a non-word
+      - "skip": ignored
+    "punct" runs are taken a character at a time, like `greedy` does.
+    Words come out in text order.
+    """
+    policies = {"alnum": alnum, "punct": punct, "space": space}
+    for kind, policy in policies.items():
+        if policy not in ("word", "non_word", "skip"):
+            raise ValueError(f"Unknown policy '{policy}' for {kind} runs")
+    find_words = _other_runs_pattern(
+        tuple(kind for kind, policy in policies.items() if policy == "word")
+    ).findall
+    find_non_words = _other_runs_pattern(
+        tuple(kind for kind, policy in policies.items() if policy == "non_word")
+    ).findall
+
+    words = []
+    # Non-word runs are collected and counted once at the end, which
+    # is much cheaper than updating a Counter per run
+    non_word_runs = []
+    non_words = collections.Counter()
+    # Splitting on a capturing pattern puts the CJK runs at odd indexes.
+    # Runs with the same policy are found together, by one pattern, so
+    # words of different kinds stay in text order.
+    for index, piece in enumerate(CJK_RUN_PATTERN.split(text)):
+        if index % 2:
+            run_words, run_non_words = segmenter(piece, is_word)
+            words.extend(run_words)
+            for non_word, count in run_non_words.items():
+                non_words[non_word] += count
+        elif piece:
+            words.extend(find_words(piece))
+            non_word_runs.extend(find_non_words(piece))
+    non_words.update(non_word_runs)
+    return words, dict(non_words)
+
+@functools.cache
+def _other_runs_pattern(kinds):
+    """A pattern finding the non-CJK runs of `kinds`, in text order
+
+    Punctuation is matched a character at a time.
+    """
+    patterns = {**RUN_PATTERNS, "punct": r"[^\w\s]|_"}
+    # Matches nothing when no kinds are given
+    return re.compile("|".join(patterns[kind] for kind in kinds) or r"(?!)")
+
+def stable_boundary(text, words, window):
+    """Find the last word boundary at least `window` characters from
+    the end of a segmented text.
+
+    For a segmenter that works left to right, like `greedy`, the words
+    before that boundary won't change if more text is added to the end,
+    as long as `window` is longer than the longest word.
+
+    Returns the boundary and the start position of each word. Positions
+    covered by no word are non-words, which are boundaries too.
+    """
+    commit = max(len(text) - window, 0)
+    starts = word_starts(text, words)
+    if starts is None:
+        # Words that aren't substrings can't be placed, so nothing can
+        # be committed.
+        return 0, [0] * len(words)
+    # Move back to the start of the word the boundary falls inside
+    index = bisect.bisect_right(starts, commit) - 1
+    if index >= 0 and commit < starts[index] + len(words[index]):
+        commit = starts[index]
+    return commit, starts
+
+
+def word_starts(text, words):
+    """Position of each word of a segmented text, or None if the words
+    aren't substrings of the text in order"""
+    if isinstance(words, Tokens):
+        return words.starts
+    starts = []
+    pos = 0
+    for word in words:
+        start = text.find(word, pos)
+        if start < 0:
+            return None
+        starts.append(start)
+        pos = start + len(word)
+    return starts
+
+
+SENTENCE_ENDINGS = "。！？!?；;…\n"
+CLOSING_PUNCTUATION = "」』”’）)》〉"
+
+def split_sentences(text):
+    """Split text into sentences, keeping the punctuation that ends
+    each one (including any closing quotes or brackets)"""
+    sentences = []
+    start = 0
+    pos = 0
+    while pos < len(text):
+        if text[pos] in SENTENCE_ENDINGS:
+            pos += 1
+            while pos < len(text) and (
+                    text[pos] in SENTENCE_ENDINGS
+                    or text[pos] in CLOSING_PUNCTUATION):
+                pos += 1
+            if text[start:pos].strip():
+                sentences.append(text[start:pos])
+            start = pos
+        else:
+            pos += 1
+    if text[start:].strip():
+        sentences.append(text[start:])
+    return sentences
+
+def segment_sentences(text, segmenter):
+    """Segment text sentence by sentence
+
+    Returns a list of (sentence, words) pairs, where `words` is the
+    list of words the segmenter found in that sentence.
+    """
+    output = []
+    for sentence in split_sentences(text):
+        words, _non_words = segmenter(sentence)
+        output.append((sentence, words))
+    return output
+
 def simplest_tree(text, is_word):
     """Find the segmentation with the fewest nodes for a clause.
     """
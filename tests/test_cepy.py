@@ -48,6 +48,220 @@ def test_cedict_lookup_pinyin():
     assert entries[0].traditional == "程序設計"
     assert entries[0].pinyin == "cheng2 xu4 she4 ji4"
 
+def test_cedict_lookup_many():
+    results = cedict.lookup_many(["巨蟒", "我", "话", "巨蟒"])
+    assert results[0][0].pinyin == "ju4 mang3"
+    assert results[1] is None
+    assert results[2][0].traditional == "話"
+    assert results[0] is results[3]
+
+    results = cedict.lookup_many(["話"], kind="traditional")
+    assert results[0][0].simplified == "话"
+
+def test_cedict_threaded_lookup():
+    import concurrent.futures
+    shared = cepy.CeDict(TEST_DICT)
+    keys = ["巨蟒", "程序", "程序设", "设计"] * 50
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        prefixes = list(pool.map(shared.is_prefix, keys))
+        found = list(pool.map(lambda k: shared.lookup(k, "any"), keys))
+    assert all(prefixes)
+    assert [f is not None for f in found] == [True, True, False, True] * 50
+
+def test_cedict_is_prefix():
+    assert cedict.is_prefix("程序设")
+    assert cedict.is_prefix("程序设计")
+    assert not cedict.is_word("程序设")
+    assert not cedict.is_prefix("计程")
+
+# LayeredCeDict
+
+class TestLayeredCeDict:
+    overlay = cepy.CeDictOverlay(
+        add = ["巨蟒 巨蟒 [ju4 mang3] /Monty Python/"],
+        override = ["話 话 [hua4] /words/"],
+        hide = ["程序"],
+    )
+    glossary = cepy.CeDictOverlay(add=["派森 派森 [pai4 sen1] /Python/"])
+    layered = cepy.LayeredCeDict(cedict, [overlay]).with_overlay(glossary)
+
+    def test_add(self):
+        entries = self.layered.lookup_simplified("巨蟒")
+        assert [e.defs for e in entries] == [["Monty Python"], ["python"]]
+        assert self.layered.lookup_simplified("派森")[0].pinyin == "pai4 sen1"
+
+    def test_override(self):
+        entries = self.layered.lookup_traditional("話")
+        assert [e.defs for e in entries] == [["words"]]
+
+    def test_hide(self):
+        assert self.layered.lookup_simplified("程序") is None
+        assert not self.layered.is_word("程序")
+        assert self.layered.is_word("程序设计")
+        assert cedict.is_word("程序")
+
+    def test_version(self):
+        assert cepy.CeDict(TEST_DICT).version == cedict.version
+        assert self.layered.version != cedict.version
+        assert self.layered.version != cepy.LayeredCeDict(cedict, [self.overlay]).version
+
+    def test_lookup_many(self):
+        results = self.layered.lookup_many(["程序", "派森"])
+        assert results[0] is None
+        assert results[1][0].defs == ["Python"]
+
+    def test_is_prefix(self):
+        assert self.layered.is_prefix("派")
+        assert not cedict.is_prefix("派")
+
+    def test_is_word(self):
+        for word in ["巨蟒", "派森", "話", "话", "程序", "程序设计", "设"]:
+            expected = self.layered.lookup(word) is not None
+            assert self.layered.is_word(word) == expected
+
+    def test_entries(self):
+        entries = list(self.layered.entries())
+        assert not [e for e in entries if e.simplified == "程序"]
+        assert [e.defs for e in entries if e.simplified == "话"] == [["words"]]
+        assert len([e for e in entries if e.simplified == "巨蟒"]) == 2
+        assert "派森" in {e.simplified for e in entries}
+
+        import cepy_tools.script_conversion as sc
+        assert sc.ScriptConverter(self.layered).to_traditional("话") == "話"
+
+def test_layered_semantics_agree():
+    base = cepy.CeDict.from_entries([
+        "後 后 [hou4] /back/",
+        "后 后 [hou4] /empress/",
+        "好 好 [hao3] /good/",
+        "好 好 [hao4] /to be fond of/",
+        "郝 郝 [hao3] /a surname/",
+    ])
+    hide_hou = cepy.LayeredCeDict(base, [cepy.CeDictOverlay(hide=["后"])])
+    hide_hao3 = cepy.LayeredCeDict(base, [cepy.CeDictOverlay(hide=["hao3"])])
+    override_hao = cepy.LayeredCeDict(base, [
+        cepy.CeDictOverlay(override=["好 好 [hao3] /fine/"])
+    ])
+
+    # Hiding 后 hides its entries whichever way they're looked up
+    assert hide_hou.lookup_traditional("後") is None
+    assert not hide_hou.is_word("後", "traditional")
+    # Hiding a reading hides only the entries with that reading
+    assert [e.pinyin for e in hide_hao3.lookup_simplified("好")] == ["hao4"]
+    assert hide_hao3.lookup_simplified("郝") is None
+    # Overriding 好 replaces 好 and nothing else
+    assert [e.defs for e in override_hao.lookup_pinyin("hao3")] == [
+        ["fine"], ["a surname"],
+    ]
+    assert [e.defs for e in override_hao.lookup_simplified("好")] == [["fine"]]
+
+    keys = {
+        "simplified": ["后", "好", "郝"],
+        "traditional": ["後", "后", "好", "郝"],
+        "pinyin": ["hou4", "hao3", "hao4"],
+    }
+    for layered in [hide_hou, hide_hao3, override_hao]:
+        entries = list(layered.entries())
+        for kind, kind_keys in keys.items():
+            for key in kind_keys:
+                found = layered.lookup(key, kind) or []
+                assert layered.is_word(key, kind) == bool(found)
+                expected = [e for e in entries if getattr(e, kind) == key]
+                assert sorted(e.line for e in found) == sorted(e.line for e in expected)
+
+def test_lookup_any():
+    assert cedict.lookup("話", "any") == cedict.lookup("话", "any")
+    assert cedict.lookup("巨蟒", "any")[0].pinyin == "ju4 mang3"
+    assert cedict.lookup("X", "any") is None
+
+    # Simplified headwords win, like lookup_simplified then
+    # lookup_traditional
+    both = cepy.CeDict.from_entries([
+        "著 著 [zhu4] /to write/",
+        "著 着 [zhe5] /aspect particle/",
+    ])
+    layered = cepy.LayeredCeDict(both, [cepy.CeDictOverlay(add=["著 着 [zhuo2] /to wear/"])])
+    for dictionary in [both, layered]:
+        assert [e.pinyin for e in dictionary.lookup("著", "any")] == ["zhu4"]
+        assert dictionary.lookup("着", "any")[-1].pinyin == "zhe5"
+        assert dictionary.lookup("著", "any") == dictionary.lookup_simplified("著")
+
+    kb = cepy.KnowledgeBase("", "")
+    plan = cepy.StudyPlan(cepy.Text("著"), kb, both, lambda t: (["著"], {})).plan()
+    assert [e.pinyin for e in plan[-1].definitions] == ["zhu4"]
+
+# LiveCeDict
+
+RELEASE = [
+    "巨蟒 巨蟒 [ju4 mang3] /python/",
+    "程序 程序 [cheng2 xu4] /procedures/",
+    "話 话 [hua4] /dialect/",
+]
+NEXT_RELEASE = [
+    "巨蟒 巨蟒 [ju4 mang3] /python/",
+    "程序 程序 [cheng2 xu4] /computer program/",
+    "派森 派森 [pai4 sen1] /Python (programming language)/",
+]
+
+def test_cedict_updated():
+    old = cepy.CeDict.from_entries(RELEASE)
+    new = old.updated(NEXT_RELEASE)
+    fresh = cepy.CeDict.from_entries(NEXT_RELEASE)
+
+    added, removed = old.diff(NEXT_RELEASE)
+    assert [e.simplified for e in added] == ["程序", "派森"]
+    assert [e.simplified for e in removed] == ["程序", "话"]
+
+    assert new.version == fresh.version != old.version
+    assert new._simp_to.keys() == fresh._simp_to.keys()
+    assert new.lookup_simplified("程序")[0].defs == ["computer program"]
+    assert new.lookup("话", "any") is None
+    assert new.is_prefix("派")
+    # Unchanged entries are shared, and the old dictionary is untouched
+    assert new._simp_to["巨蟒"] is old._simp_to["巨蟒"]
+    assert old.lookup_simplified("程序")[0].defs == ["procedures"]
+
+def test_live_cedict_swap():
+    live = cepy.LiveCeDict(cepy.CeDict.from_entries(RELEASE))
+    swaps = []
+    live.subscribe(lambda old, new: swaps.append((old.version, new.version)))
+    old_version = live.version
+
+    added, removed = live.update(NEXT_RELEASE)
+    assert len(added) == 2 and len(removed) == 2
+    assert swaps == [(old_version, live.version)]
+    assert live.is_word("派森")
+    assert not live.is_word("话")
+
+def test_live_cedict_word_frequency():
+    live = cepy.LiveCeDict(cepy.CeDict.from_entries(RELEASE))
+    live_segmenter = lambda text: ws.greedy(text, live.is_word)
+    text = cepy.Text("话巨")
+    kb = cepy.KnowledgeBase("", "")
+    planner = cepy.StudyPlan(text, kb, live, live_segmenter)
+    assert planner.word_frequency == {"话": 1}
+
+    live.update(RELEASE + ["巨 巨 [ju4] /huge/"])
+    assert text.word_frequency(live_segmenter, live.version) == {"话": 1, "巨": 1}
+    assert cepy.StudyPlan(text, kb, live, live_segmenter).word_frequency == {"话": 1, "巨": 1}
+
+    # A plan made before the swap catches up on the next append
+    text.append("蟒")
+    assert planner.word_frequency == {"话": 1, "巨蟒": 1}
+    expected = cepy.StudyPlan(cepy.Text("话巨蟒"), kb, live, live_segmenter)
+    assert planner.stats() == expected.stats()
+
+def test_live_cedict_reload_in_background(tmp_path):
+    path = tmp_path / "cedict.txt"
+    path.write_text("\n".join(RELEASE) + "\n", encoding="utf-8")
+    live = cepy.LiveCeDict(cepy.CeDict(path))
+    assert live.is_word("话")
+
+    path.write_text("\n".join(NEXT_RELEASE) + "\n", encoding="utf-8")
+    live.reload_in_background().join()
+    assert live.is_word("派森")
+    assert live.version == cepy.CeDict(path).version
+
 # CeDictEntry
 
 def test_cedict_entry_serialize():
@@ -61,6 +275,25 @@ def test_cedict_entry_serialize():
     }
     assert entry.serialize() == expected
 
+def test_cedict_entry_unicode_pinyin():
+    entry = cepy.CeDictEntry.from_line("女人 女人 [nu:3 ren2] /woman/")
+    assert entry.unicode_pinyin == "nǚ rén"
+
+    entries = cedict.lookup_simplified("程序设计") + cedict.lookup_simplified("话")
+    rendered = cepy.CeDictEntry.unicode_pinyin_many(entries)
+    assert rendered == ["chéng xù shè jì", "huà"]
+    assert entries[1].unicode_pinyin == "huà"
+
+def test_cedict_entry_is_variant():
+    for line, expected in [
+        ("這裏 这里 [zhe4 li3] /variant of 這裡|这里[zhe4 li3]/", True),
+        ("裏 里 [li3] /old variant of 裡|里[li3]/", True),
+        ("這裡 这里 [zhe4 li3] /here/", False),
+        ("稱 称 [chen4] /to fit/balanced/suitable/", False),
+        ("秤 秤 [cheng4] /steelyard/to weigh (variant of 稱|称[cheng1])/", False),
+    ]:
+        assert cepy.CeDictEntry.from_line(line).is_variant == expected
+
 # KnowledgeBase
 kb = cepy.KnowledgeBase(
     characters = "巨蟒程序设计话",
@@ -88,6 +321,9 @@ def is_word(text):
 def segmenter(text):
     return ws.greedy(text, is_word)
 
+def token_segmenter(text):
+    return ws.greedy(text, is_word, output="tokens")
+
 class TestText:
     text = cepy.Text("巨蟒程序设计话巨蟒")
 
@@ -102,6 +338,30 @@ class TestText:
         expected = {"巨蟒":2, "程序": 1, "设计":1, "话":1}
         assert word_counts == expected
 
+    def test_text_append(self):
+        full = "巨蟒程序设计话巨蟒。程序设计，话巨蟒程序" * 5
+        text = cepy.Text(full[:7])
+        text.word_frequency(segmenter)
+        text.segmentation_window = 5
+        for start in range(7, len(full), 4):
+            text.append(full[start:start + 4])
+
+        expected = cepy.Text(full)
+        assert text.text == full
+        assert text.character_frequency() == expected.character_frequency()
+        assert text.word_frequency(segmenter) == expected.word_frequency(segmenter)
+
+    def test_text_append_tokens(self):
+        full = "巨蟒程序设计话巨蟒。程序设计，话巨蟒程序" * 5
+        text = cepy.Text(full[:7])
+        text.word_frequency(token_segmenter)
+        text.segmentation_window = 5
+        for start in range(7, len(full), 4):
+            text.append(full[start:start + 4])
+
+        expected = cepy.Text(full).word_frequency(segmenter)
+        assert text.word_frequency(token_segmenter) == expected
+
 # StudyPlan
 
 def test_plan():
@@ -117,3 +377,147 @@ def test_plan():
     new_words = [w.text for w in plan if w.text_type == "word"]
     assert "设计" in new_words
     assert "程序" not in new_words
+
+def test_plan_follows_appended_text():
+    text = cepy.Text("巨蟒程序")
+    kb = cepy.KnowledgeBase("话程序", "程序")
+    planner = cepy.StudyPlan(text, kb, cedict, segmenter)
+    text.append("设计话巨")
+    text.append("蟒")
+
+    expected = cepy.StudyPlan(cepy.Text("巨蟒程序设计话巨蟒"), kb, cedict, segmenter)
+    assert planner.stats() == expected.stats()
+    assert planner.new_words == expected.new_words
+    assert list(planner.coverage_curve()) == [0.4, 0.8, 1.0]
+
+def test_appended_plan_order():
+    # 巨 is counted as a word, then merged into 巨蟒, then seen again,
+    # so it's first seen at a different point than in the full text
+    text = cepy.Text("话巨")
+    kb = cepy.KnowledgeBase("", "")
+    planner = cepy.StudyPlan(text, kb, cedict, segmenter)
+    text.append("蟒设计巨")
+
+    expected = cepy.StudyPlan(cepy.Text("话巨蟒设计巨"), kb, cedict, segmenter)
+    assert [str(e) for e in planner.plan()] == [str(e) for e in expected.plan()]
+    assert planner._coverage_table("word") == expected._coverage_table("word")
+
+def test_plans_are_not_kept_alive():
+    import gc
+    text = cepy.Text("巨蟒程序")
+    kb = cepy.KnowledgeBase("话程序", "程序")
+    for _ in range(100):
+        cepy.StudyPlan(text, kb, cedict, segmenter).sentence_index()
+    gc.collect()
+    assert len(text._subscribers) == 0
+    assert len(kb._subscribers) == 0
+
+    planner = cepy.StudyPlan(text, kb, cedict, segmenter)
+    text.unsubscribe(planner._text_appended)
+    text.append("巨蟒")
+    assert planner.total_words() == 2
+
+def test_plan_from_tokens():
+    text = cepy.Text("巨蟒程序设计话巨蟒。程序设计")
+    kb = cepy.KnowledgeBase("话程序", "程序")
+    planner = cepy.StudyPlan(text, kb, cedict, token_segmenter)
+    expected = cepy.StudyPlan(text, kb, cedict, segmenter)
+    assert planner.stats() == expected.stats()
+    assert [str(e) for e in planner.plan()] == [str(e) for e in expected.plan()]
+
+class TestCoverage:
+    text = cepy.Text("巨蟒程序设计话巨蟒")
+    kb = cepy.KnowledgeBase("话程序", "程序")
+    planner = cepy.StudyPlan(text, kb, cedict, segmenter)
+
+    def test_coverage_curve(self):
+        assert list(self.planner.coverage_curve()) == [0.4, 0.8, 1.0]
+        char_curve = self.planner.coverage_curve("char")
+        assert len(char_curve) == 5
+        assert char_curve[0] == 3 / 9
+        assert char_curve[-1] == 1.0
+
+    def test_count_for_coverage(self):
+        assert self.planner.count_for_coverage(0.3) == 0
+        assert self.planner.count_for_coverage(0.8) == 1
+        assert self.planner.count_for_coverage(0.9) == 2
+        assert self.planner.vocabulary_for_coverage(0.8) == ["巨蟒"]
+        assert self.planner.count_for_coverage(0.5, "char") == 1
+
+    def test_coverage_many(self):
+        kbs = [self.kb, cepy.KnowledgeBase("", "")]
+        coverages = cepy.coverage_many(self.text, kbs, segmenter)
+        assert coverages[0] == {"char": 3 / 9, "word": 0.4}
+        assert coverages[1] == {"char": 0, "word": 0}
+
+def test_approximate_plan():
+    text = cepy.Text("巨蟒程序设计话巨蟒" * 3)
+    kb = cepy.KnowledgeBase("话程序", "程序")
+    exact = cepy.StudyPlan(text, kb, cedict, segmenter)
+    roomy = cepy.StudyPlan(text, kb, cedict, segmenter, capacity=100)
+    assert roomy.word_frequency == exact.word_frequency
+    assert [str(e) for e in roomy.plan()] == [str(e) for e in exact.plan()]
+
+    tight = cepy.StudyPlan(text, kb, cedict, segmenter, capacity=2)
+    plan = tight.plan(top_n=1)
+    assert [e.text for e in plan if e.text_type == "word"] == ["X", "巨蟒"]
+    assert tight.total_words() == exact.total_words()
+    for entry, exact_entry in zip(plan, exact.plan()):
+        if entry.text == exact_entry.text:
+            assert abs(entry.cumulative_word - exact_entry.cumulative_word) <= entry.word_error
+
+def test_sentence_index():
+    text = cepy.Text("巨蟒程序。设计巨蟒话。程序设计！话")
+    kb = cepy.KnowledgeBase("话", "程序")
+    index = cepy.SentenceIndex(text, segmenter, kb)
+
+    assert index.sentences_with("巨蟒") == ["巨蟒程序。", "设计巨蟒话。"]
+    assert index.i_plus_one("巨蟒") == ["巨蟒程序。"]
+    assert index.i_plus_one("设计") == ["程序设计！"]
+    assert index.unknown_count(1) == 2
+
+    kb.learn(words=["设计"])
+    assert index.unknown_count(1) == 1
+    assert index.i_plus_one("巨蟒") == ["巨蟒程序。", "设计巨蟒话。"]
+    assert index.i_plus_one("设计") == []
+
+    kb.learn(characters="巨蟒")
+    assert index.i_plus_one("巨蟒") == ["巨蟒程序。", "设计巨蟒话。"]
+
+    kb.learn(words=["巨蟒"])
+    assert index.i_plus_one("巨蟒") == []
+    assert index.unknown_count(0) == 0
+
+def test_sentence_index_follows_appended_text():
+    full = "巨蟒程序。设计巨蟒话。 程序设计！」话\n\n巨蟒。" * 3
+    text = cepy.Text(full[:6])
+    kb = cepy.KnowledgeBase("话", "程序")
+    planner = cepy.StudyPlan(text, kb, cedict, segmenter)
+    index = planner.sentence_index()
+    for start in range(6, len(full), 5):
+        text.append(full[start:start + 5])
+    kb.learn(words=["设计"])
+
+    expected = cepy.SentenceIndex(cepy.Text(full), segmenter, kb)
+    assert index.sentences == expected.sentences
+    for word in ["巨蟒", "设计", "话"]:
+        assert index.sentences_with(word) == expected.sentences_with(word)
+        assert index.i_plus_one(word) == expected.i_plus_one(word)
+    assert list(index._unknown_count) == list(expected._unknown_count)
+
+def test_reading_plan():
+    sections = ["巨蟒巨蟒话", cepy.Text("程序设计巨蟒"), "程序设计话"]
+    kb = cepy.KnowledgeBase("", "")
+    reading = cepy.ReadingPlan(sections, kb, cedict, segmenter, coverage=0.6)
+    plans = list(reading.plan())
+
+    words = [[e.text for e in p[1:] if e.text_type == "word"] for p in plans]
+    assert words == [["巨蟒"], ["程序"], ["设计"]]
+    assert plans[1][0].cumulative_word == 1 / 3
+    assert plans[2][-1].cumulative_word == 2 / 3
+    assert [e.text for e in plans[0] if e.text_type == "char"] == ["巨", "蟒"]
+
+    # The planner doesn't subscribe to sections, even while in use
+    steps = reading.plan()
+    next(steps), next(steps)
+    assert len(sections[1]._subscribers) == 0
@@ -0,0 +1,116 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import functools
+import pathlib
+
+import pytest
+
+import cepy_tools.cepy as cepy
+import cepy_tools.corpus as corpus
+import cepy_tools.word_segmentation as ws
+
+TEST_DICT = pathlib.Path(__file__).parent / "test_dict.txt"
+
+cedict = cepy.CeDict(TEST_DICT)
+
+def segmenter(text):
+    return ws.greedy(text, cedict.is_word)
+
+FULL_TEXT = "巨蟒程序设计。话巨蟒！程序，设计话巨蟒程序设计" * 3
+
+
+def test_round_trip(tmp_path):
+    built = corpus.TokenizedCorpus.build(FULL_TEXT, segmenter, cedict.version)
+    path = tmp_path / "text.cepytok"
+    built.save(path)
+    loaded = corpus.TokenizedCorpus.load(path)
+
+    expected = cepy.Text(FULL_TEXT)
+    assert loaded.word_frequency() == expected.word_frequency(segmenter)
+    assert loaded.character_frequency() == expected.character_frequency()
+    assert loaded.metadata["sentence_count"] == 7
+    assert loaded.sentence_words(1) == ["话", "巨蟒"]
+    assert loaded.matches(FULL_TEXT, cedict.version, "segmenter")
+    assert not loaded.matches(FULL_TEXT + "话")
+    loaded.close()
+
+
+def test_concurrent_saves(tmp_path):
+    import concurrent.futures
+    built = corpus.TokenizedCorpus.build(FULL_TEXT, segmenter, cedict.version)
+    path = tmp_path / "text.cepytok"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: built.save(path), range(32)))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["text.cepytok"]
+    loaded = corpus.TokenizedCorpus.load(path)
+    assert loaded.word_frequency() == built.word_frequency()
+    loaded.close()
+
+
+def test_build_from_tokens():
+    built = corpus.TokenizedCorpus.build(
+        FULL_TEXT, lambda t: ws.greedy(t, cedict.is_word, output="tokens"),
+        cedict.version, "greedy tokens",
+    )
+    expected = corpus.TokenizedCorpus.build(FULL_TEXT, segmenter, cedict.version)
+    assert built.word_frequency() == expected.word_frequency()
+    assert built.sentence_starts == expected.sentence_starts
+    assert built.metadata["tail_token"] == expected.metadata["tail_token"]
+
+
+def test_text_from_corpus(tmp_path):
+    def no_segmenting(text):
+        raise AssertionError("Should not segment")
+
+    loaded = corpus.TokenizedCorpus.load_or_build(
+        tmp_path, FULL_TEXT, segmenter, cedict.version, "greedy"
+    )
+    again = corpus.TokenizedCorpus.load_or_build(
+        tmp_path, FULL_TEXT, no_segmenting, cedict.version, "greedy"
+    )
+    assert again.word_frequency() == loaded.word_frequency()
+
+    text = cepy.Text(FULL_TEXT)
+    text.load_corpus(loaded, segmenter)
+    kb = cepy.KnowledgeBase("话", "")
+    planner = cepy.StudyPlan(text, kb, cedict, segmenter)
+    expected = cepy.StudyPlan(cepy.Text(FULL_TEXT), kb, cedict, segmenter)
+    assert planner.stats() == expected.stats()
+
+    text.append("程序设计")
+    expected_text = cepy.Text(FULL_TEXT + "程序设计")
+    assert text.word_frequency(segmenter) == expected_text.word_frequency(segmenter)
+
+
+def test_unnamed_segmenters(tmp_path):
+    for unnamed in [
+        lambda t: ws.greedy(t, cedict.is_word),
+        functools.partial(ws.greedy, is_word=cedict.is_word),
+    ]:
+        with pytest.raises(ValueError):
+            corpus.TokenizedCorpus.load_or_build(
+                tmp_path, FULL_TEXT, unnamed, cedict.version
+            )
+    assert list(tmp_path.iterdir()) == []
+
+    loaded = corpus.TokenizedCorpus.load_or_build(
+        tmp_path, FULL_TEXT, segmenter, cedict.version
+    )
+    assert loaded.metadata["segmenter"] == "segmenter"
+    loaded.close()
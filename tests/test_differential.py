@@ -0,0 +1,66 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+
+import cepy_tools.cepy as cepy
+import cepy_tools.differential as differential
+import cepy_tools.pinyin as pin
+
+TEST_DICT = pathlib.Path(__file__).parent / "test_dict.txt"
+
+cedict = cepy.CeDict(TEST_DICT)
+
+
+def test_minimize():
+    assert differential.minimize("我很喜欢x程序设计", lambda v: "x" in v) == "x"
+
+
+def test_outcome():
+    assert differential.outcome(int, "3") == ("returned", 3)
+    assert differential.outcome(int, "x") == ("raised", "ValueError")
+
+    def hang(value):
+        while True:
+            pass
+    assert differential.outcome(hang, "", timeout=0.05) == ("timed out", None)
+
+
+def test_divergences_are_minimized():
+    def drops_apostrophes(pinyin):
+        return pin.normalize_pinyin(pinyin.replace("'", ""))
+
+    divergences = differential.check("normalize_pinyin", drops_apostrophes, cedict, runs=100)
+    assert divergences
+    for divergence in divergences:
+        assert "'" in divergence.minimized
+        assert len(divergence.minimized) <= 3
+        assert divergence.expected != divergence.actual
+
+
+def test_fast_paths_match():
+    for name, candidates in differential.FAST_PATHS.items():
+        for candidate in candidates:
+            assert differential.check(name, candidate, cedict, runs=200) == []
+
+
+def test_main_usage(capsys):
+    assert set(differential.TARGETS) == set(differential.targets(cedict))
+    assert differential.main(["greedy"]) == 2
+    assert "usage:" in capsys.readouterr().err
+    assert differential.main(["nope", "json:loads"]) == 2
+    assert differential.main(["--runs"]) == 2
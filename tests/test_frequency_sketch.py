@@ -0,0 +1,45 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import collections
+import random
+
+import cepy_tools.frequency_sketch as fs
+
+def test_space_saving_exact_under_capacity():
+    sketch = fs.SpaceSaving(10)
+    sketch.update("巨蟒巨蟒话")
+    assert sketch.counts() == {"巨": 2, "蟒": 2, "话": 1}
+    assert sketch.most_common(1) == [("巨", 2, 0)]
+    assert sketch.total == 5
+
+
+def test_space_saving_bounds():
+    rng = random.Random(3)
+    stream = [min(int(rng.paretovariate(1.0)), 500) for _ in range(20000)]
+    exact = collections.Counter(stream)
+    sketch = fs.SpaceSaving(50)
+    sketch.update(stream)
+
+    assert len(sketch) == 50
+    assert sum(sketch.counts().values()) == len(stream)
+    for item, count, error in sketch.most_common():
+        assert count - error <= exact[item] <= count
+        assert error <= sketch.max_error
+    for item, count in exact.items():
+        if count > sketch.max_error:
+            assert item in sketch
@@ -0,0 +1,50 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import subprocess
+import sys
+
+def loaded_modules(statement):
+    code = f"{statement}; import sys; print(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+def test_import_is_lazy():
+    loaded = loaded_modules("import cepy_tools")
+    assert "cepy_tools.cepy" not in loaded
+    assert "cepy_dict" not in loaded
+
+    loaded = loaded_modules("import cepy_tools.pinyin")
+    assert "cepy_tools.cepy" not in loaded
+    assert "csv" not in loaded
+
+def test_lazy_attributes():
+    import cepy_tools
+    import cepy_tools.cepy
+    assert cepy_tools.CeDict is cepy_tools.cepy.CeDict
+    assert "StudyPlan" in dir(cepy_tools)
+
+def test_lazy_submodules():
+    loaded = loaded_modules("import cepy_tools; cepy_tools.serialize")
+    assert "cepy_tools.serialize" in loaded
+    assert "cepy_tools.cepy" not in loaded
+
+    import cepy_tools
+    assert cepy_tools.cepy.CeDict is cepy_tools.CeDict
+    assert "word_segmentation" in dir(cepy_tools)
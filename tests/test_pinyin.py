@@ -28,7 +28,8 @@ def test_normalize_pinyin():
         "xian": "xian5",
         "xīān": "xi1 an1",
         "xīan": "xian1",
-        "là de cài.": "la4 de5 cai4"
+        "là de cài.": "la4 de5 cai4",
+        "wo3 yao4": "wo3 yao4",
     }
     for input_pinyin, expected in tests.items():
         assert pin.normalize_pinyin(input_pinyin) == expected
@@ -92,3 +93,20 @@ def test_tone_diacritic_to_numeral():
     }
     for text, expected in tests.items():
         assert pin.tone_diacritic_to_number_string(text) == expected
+
+
+def test_number_to_diacritic():
+    tests = {
+        "cheng2 xu4 she4 ji4": "chéng xù shè jì",
+        "nu:3 ren2": "nǚ rén",
+        "lu:e4": "lüè",
+        "shou3 gui4 liu2": "shǒu guì liú",
+        "Xi1 an1": "Xī ān",
+        "hua1 r5": "huā r",
+        "T F ka3": "T F kǎ",
+    }
+    for numbered, expected in tests.items():
+        assert pin.number_to_diacritic(numbered) == expected
+
+    numbered = list(tests)
+    assert pin.number_to_diacritic_many(numbered * 2) == list(tests.values()) * 2
@@ -0,0 +1,89 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+
+import cepy_tools.cepy as cepy
+import cepy_tools.pinyin_conversion as pc
+
+TEST_DICT = pathlib.Path(__file__).parent / "test_dict.txt"
+
+cedict = cepy.CeDict(TEST_DICT)
+converter = pc.PinyinConverter(cedict)
+
+def test_convert():
+    assert converter.convert("chengxusheji")[0] == "程序设计"
+    assert converter.convert("jumang hua")[0] == "巨蟒话"
+    assert converter.convert("Ju4mang3hua4")[0] == "巨蟒话"
+    assert converter.convert("jùmǎng")[0] == "巨蟒"
+
+
+def test_candidates():
+    candidates = converter.candidates("chengxusheji", k=3)
+    assert candidates[0] == ["程序设计"]
+    assert ["程序", "设计"] in candidates
+
+
+def test_tones_filter():
+    # 设 is she4, so a wrong tone rules it out
+    assert converter.convert("she2ji4")[0] == "she2计"
+
+
+def test_traditional_and_passthrough():
+    traditional = pc.PinyinConverter(cedict, script="traditional")
+    assert traditional.convert("hua chengxusheji")[0] == "話程序設計"
+    assert converter.convert("xyz hua")[0] == "xyz话"
+
+
+def test_common_words_rank_first():
+    common = pc.PinyinConverter(cepy.CeDict.from_entries([
+        "塔 塔 [ta3] /pagoda/",
+        "他 他 [ta1] /he/",
+        "區 区 [qu1] /area/",
+        "去 去 [qu4] /to go/",
+        "數 数 [shu4] /number/",
+        "說 说 [shuo1] /to speak/",
+    ]))
+    assert common.convert("taqu")[:4] == ["他去", "他区", "塔去", "塔区"]
+    assert common.convert("tashuo")[0] == "他说"
+
+
+def test_main_reading_gets_the_count():
+    readings = pc.PinyinConverter(cepy.CeDict.from_entries([
+        "省 省 [sheng3] /province/to save/",
+        "省 省 [xing3] /to reflect/",
+        "省長 省长 [sheng3 zhang3] /governor of a province/",
+        "節省 节省 [jie2 sheng3] /to save/",
+        "反省 反省 [fan3 xing3] /to reflect on oneself/",
+        "行 行 [xing2] /to go/OK/",
+        "追 追 [dui1] /to sculpt/",
+        "追 追 [zhui1] /to chase/",
+        "追求 追求 [zhui1 qiu2] /to pursue/",
+        "堆 堆 [dui1] /pile/",
+        "給 给 [gei3] /to give/",
+        "假 假 [gei1] /used in 假掰[gei1 bai1]/",
+        "假 假 [jia3] /fake/",
+    ]))
+    # 省 is far more common than 行, but mostly as sheng3
+    assert readings.convert("xing")[:2] == ["行", "省"]
+    assert readings.convert("sheng")[0] == "省"
+    assert readings.convert("dui")[:2] == ["堆", "追"]
+    # "used in" entries aren't counted at all
+    cost = readings._estimated_cost()
+    [gei_jia] = readings.cedict.lookup_pinyin("gei1")
+    [jia] = readings.cedict.lookup_pinyin("jia3")
+    assert cost("假", gei_jia) > cost("假", jia) + pc.UNCOUNTED_COST
@@ -0,0 +1,70 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+
+import cepy_tools.cepy as cepy
+import cepy_tools.script_conversion as sc
+
+TEST_DICT = pathlib.Path(__file__).parent / "test_dict.txt"
+
+cedict = cepy.CeDict(TEST_DICT)
+
+def test_to_traditional():
+    converter = sc.ScriptConverter(cedict)
+    assert converter.to_traditional("程序设计话，巨蟒!") == "程序設計話，巨蟒!"
+
+
+def test_to_simplified():
+    converter = sc.ScriptConverter(cedict)
+    assert converter.to_simplified("我的話程序設計") == "我的话程序设计"
+
+
+def test_longest_phrase_wins():
+    hair = cepy.CeDict.from_entries([
+        "發 发 [fa1] /to send out/",
+        "出發 出发 [chu1 fa1] /to set off/",
+        "發現 发现 [fa1 xian4] /to find/",
+        "髮 发 [fa4] /hair/",
+        "頭髮 头发 [tou2 fa5] /hair/",
+    ])
+    converter = sc.ScriptConverter(hair)
+    assert converter.to_traditional("发头发") == "發頭髮"
+    assert converter.to_simplified("頭髮發") == "头发发"
+
+
+def test_tables_follow_dictionary_version():
+    live = cepy.LiveCeDict(cepy.CeDict.from_entries(["髮 发 [fa4] /hair/"]))
+    converter = sc.ScriptConverter(live)
+    assert converter.to_traditional("发") == "髮"
+    live.update(["發 发 [fa1] /to send out/"])
+    assert converter.to_traditional("发") == "發"
+
+
+def test_variants_lose():
+    here = cepy.CeDict.from_entries([
+        "這裏 这里 [zhe4 li3] /variant of 這裡|这里[zhe4 li3]/",
+        "這裡 这里 [zhe4 li3] /here/",
+        "裏 里 [li3] /old variant of 裡|里[li3]/",
+        "裏 里 [li3] /variant of 裡|里[li3]/",
+        "裡 里 [li3] /inside/",
+        "裏頭 里头 [li3 tou5] /variant of 裡頭|里头[li3 tou5]/",
+    ])
+    converter = sc.ScriptConverter(here)
+    assert converter.to_traditional("这里里") == "這裡裡"
+    # A variant is still used where nothing else covers the phrase
+    assert converter.to_traditional("里头") == "裏頭"
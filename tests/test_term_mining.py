@@ -0,0 +1,86 @@
+# cepy-tools - a sleepy little chinese-english python toolkit
+#
+# Copyright (C) 2025 Erik Swanson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+
+import pytest
+
+import cepy_tools.cepy as cepy
+import cepy_tools.term_mining as tm
+import cepy_tools.word_segmentation as ws
+
+TEST_DICT = pathlib.Path(__file__).parent / "test_dict.txt"
+
+cedict = cepy.CeDict(TEST_DICT)
+
+# 韦小宝 (not in the dictionary) between varied dictionary words
+TEXT = "，".join(
+    f"{before}韦小宝{after}"
+    for before, after in zip("巨蟒程序设计话巨蟒程", "话设计程序巨蟒程话序")
+)
+
+
+def test_suffix_array():
+    text = "banana"
+    assert list(tm.suffix_array(text, 8)) == [5, 3, 1, 0, 4, 2]
+    # Only the first two characters are compared, ties in start order
+    assert list(tm.suffix_array(text, 2)) == [5, 1, 3, 0, 2, 4]
+
+
+def test_suffix_batches():
+    runs = tm.cjk_runs("巨蟒巨话，巨蟒蟒")
+    whole = list(tm.suffix_array(runs, 4))
+    batches = [list(b) for b in tm.suffix_batches(runs, 4, batch_size=2)]
+    # 巨 starts three suffixes, so they're split by the next character
+    assert batches[:2] == [[0, 5], [2]]
+    assert [i for b in batches for i in b] == [i for i in whole if runs[i] != "\0"]
+
+    # Ties between equal suffixes stay in start order in every batch
+    runs = tm.cjk_runs(TEXT)
+    whole = [i for i in tm.suffix_array(runs, 3) if runs[i] != "\0"]
+    for batch_size in [1, 7, len(runs)]:
+        batches = tm.suffix_batches(runs, 3, batch_size=batch_size)
+        assert [i for b in batches for i in b] == whole
+
+
+def test_cjk_runs():
+    assert tm.cjk_runs("韦小宝, Python 和巨蟒!") == "韦小宝\0和巨蟒"
+
+
+def test_mine_terms():
+    terms = tm.mine_terms(TEXT, cedict.is_word, min_cohesion=1)
+    assert terms[0].text == "韦小宝"
+    assert terms[0].count == 10
+    # Parts of the name always have the rest of it beside them
+    assert "韦小" not in [t.text for t in terms]
+    assert "小宝" not in [t.text for t in terms]
+
+
+def test_mine_terms_in_batches():
+    terms = tm.mine_terms(TEXT, cedict.is_word, min_cohesion=1)
+    batched = tm.mine_terms(TEXT, cedict.is_word, min_cohesion=1, batch_size=4)
+    assert [repr(t) for t in batched] == [repr(t) for t in terms]
+
+    with pytest.raises(ValueError):
+        tm.mine_terms(TEXT, min_count=1)
+
+
+def test_overlay():
+    terms = tm.mine_terms(TEXT, cedict.is_word, min_cohesion=1)[:1]
+    layered = cepy.LayeredCeDict(cedict, [tm.overlay(terms)])
+    words, _non_words = ws.greedy("巨蟒韦小宝", layered.is_word, layered.is_prefix)
+    assert words == ["巨蟒", "韦小宝"]
@@ -40,3 +40,76 @@ def test_greedy():
     print(output2)
     print(expected2)
     assert output2 == expected2
+
+
+def test_greedy_prefix():
+    words = {"程序", "程序设计", "设计", "程", "序", "设", "计"}
+    prefixes = {w[:i] for w in words for i in range(1, len(w) + 1)}
+    is_word = lambda t: t in words
+    is_prefix = lambda t: t in prefixes
+
+    text = "程序设计。程序"
+    assert ws.greedy(text, is_word) == (["程序", "设计", "程序"], {"。": 1})
+    output = ws.greedy(text, is_word, is_prefix)
+    assert output == (["程序设计", "程序"], {"。": 1})
+
+
+def test_greedy_tokens():
+    text = "我喜欢中国菜。你喜欢的吗"
+    words, non_words = ws.greedy(text, word_sample_func)
+    tokens, token_non_words = ws.greedy(text, word_sample_func, output="tokens")
+    assert tokens == words
+    assert token_non_words == non_words
+    assert tokens.vocabulary == ["我", "喜欢", "中国菜", "你", "的", "吗"]
+    assert list(tokens.ids) == [0, 1, 2, 3, 1, 4, 5]
+    assert list(tokens.starts) == [0, 1, 3, 7, 8, 10, 11]
+    assert list(tokens.ends()) == [1, 3, 6, 8, 10, 11, 12]
+    assert tokens.frequency(3) == {"你": 1, "喜欢": 1, "的": 1, "吗": 1}
+    assert ws.word_starts(text, tokens) == tokens.starts
+
+
+def test_split_sentences():
+    text = "她是美国人。你喜欢中国菜吗？“我喜欢！”\n好"
+    expected = ["她是美国人。", "你喜欢中国菜吗？", "“我喜欢！”\n", "好"]
+    assert ws.split_sentences(text) == expected
+
+    segmented = ws.segment_sentences("她是美国人。你喜欢", lambda t: ws.greedy(t, word_sample_func))
+    assert segmented == [("她是美国人。", ["她", "是", "美国", "人"]), ("你喜欢", ["你", "喜欢"])]
+
+
+def test_script_runs():
+    runs = ws.script_runs("我用Python 3写程序，好!")
+    assert runs == [
+        ("cjk", "我用"), ("alnum", "Python"), ("space", " "), ("alnum", "3"),
+        ("cjk", "写程序"), ("punct", "，"), ("cjk", "好"), ("punct", "!"),
+    ]
+
+
+def test_pretokenized():
+    text = "她用Python 3.10。中国菜, 好!!"
+    output = ws.pretokenized(text, word_sample_func)
+    assert output[0] == ["她", "中国菜"]
+    assert output[1] == {
+        "用": 1, "好": 1, "Python": 1, "3": 1, "10": 1,
+        ".": 1, "。": 1, ",": 1, "!": 2,
+    }
+
+    output = ws.pretokenized(text, word_sample_func, alnum="word", punct="skip")
+    assert output == (["她", "Python", "3", "10", "中国菜"], {"用": 1, "好": 1})
+
+    # Words of different kinds stay in text order
+    output = ws.pretokenized(
+        "我用Python, 3写程序", word_sample_func, alnum="word", punct="word"
+    )
+    assert output[0] == ["我", "Python", ",", "3"]
+    output = ws.pretokenized("a, b", word_sample_func, alnum="word", space="word")
+    assert output == (["a", " ", "b"], {",": 1})
+
+
+def test_pretokenized_unknown_policy():
+    try:
+        ws.pretokenized("你好", word_sample_func, alnum="keep")
+    except ValueError:
+        pass
+    else:
+        assert False, "expected a ValueError"